@@ -1,3 +1,5 @@
+import os
+
 from flask import Flask
 from flask_bcrypt import Bcrypt
 from flask_cors import CORS
@@ -10,7 +12,7 @@ bcrypt = Bcrypt()
 jwt = JWTManager()
 mail = Mail()
 
-def create_app():
+def create_app(config=None):
     app = Flask(__name__)
     CORS(app)
     app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///data.sqlite3'
@@ -21,11 +23,45 @@ def create_app():
     app.config['MAIL_USERNAME'] = ''
     app.config['MAIL_PASSWORD'] = ''
     app.config['MAIL_DEFAULT_SENDER'] = ''
+    app.config['SUMMARY_CACHE_MEMORY_SIZE'] = 512
+    app.config['SUMMARY_CACHE_DISK_SIZE'] = 20000
+    app.config['SUMMARY_CACHE_TTL'] = 7 * 24 * 3600
+    app.config['JOB_WORKERS'] = 2
+    app.config['JOB_RETENTION'] = 3600
+    app.config['SERVER_TIMING'] = True
+    # Set INFERENCE_ADDRESS to send model work to the server started by run_inference.py.
+    app.config['INFERENCE_ADDRESS'] = os.environ.get('INFERENCE_ADDRESS', '')
+    app.config['INFERENCE_AUTHKEY'] = os.environ.get('INFERENCE_AUTHKEY', 'your_inference_key').encode()
+    app.config['INFERENCE_TIMEOUT'] = 300.0
+    app.config['ADMISSION_GLOBAL_BUDGET'] = int(os.environ.get('ADMISSION_GLOBAL_BUDGET', '360'))
+    app.config['ADMISSION_USER_BUDGET'] = int(os.environ.get('ADMISSION_USER_BUDGET', '120'))
+    app.config['ADMISSION_QUEUE_TIMEOUT'] = 10.0
+    app.config['ADMISSION_MAX_WAITING'] = 16
+    app.config['HISTORY_WRITE_BEHIND'] = True
+    app.config['HISTORY_BATCH_SIZE'] = 100
+    app.config['HISTORY_FLUSH_INTERVAL'] = 1.0
+    app.config['SQLITE_WAL'] = True
+    app.config['WARMUP_MODELS'] = os.environ.get('WARMUP_MODELS', '0') == '1'
+    if config:
+        app.config.update(config)
     mail.init_app(app)
     bcrypt.init_app(app)
     jwt.init_app(app)
     from routes import routes
     app.register_blueprint(routes)
     db.init_app(app)
+    from history import history_writer
+    history_writer.init_app(app)
+    from caching import summary_cache
+    summary_cache.init_app(app)
+    from admission import admission_controller
+    admission_controller.init_app(app)
+    from jobs import job_manager
+    job_manager.init_app(app)
+    from inference import inference_client
+    inference_client.init_app(app)
+    if app.config['WARMUP_MODELS'] and not inference_client.enabled:
+        from utils.summarization import get_summarizer
+        get_summarizer()
     app.debug = True
     return app
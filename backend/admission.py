@@ -0,0 +1,115 @@
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+from utils.metrics import metrics
+
+# Cost is measured in transcript-minutes: one minute of video summarized in one language.
+ASR_COST_FACTOR = 4
+MIN_COST = 1
+
+decisions_total = metrics.counter('admission_decisions_total',
+                                  'Admission decisions for summary work by outcome and reason.')
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, reason, retry_after):
+        super().__init__(f"Over capacity ({reason}), retry after {retry_after}s")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+def estimate_cost(length_seconds, languages, asr=False):
+    cost = max(MIN_COST, math.ceil((length_seconds or 0) / 60)) * max(1, languages)
+    return cost * ASR_COST_FACTOR if asr else cost
+
+
+class AdmissionController:
+    def __init__(self, global_budget=360, user_budget=120, queue_timeout=10.0, max_waiting=16):
+        self.global_budget = global_budget
+        self.user_budget = user_budget
+        self.queue_timeout = queue_timeout
+        self.max_waiting = max_waiting
+        self.in_use = 0
+        self.waiting = 0
+        self._by_client = {}
+        self._condition = threading.Condition()
+        # Running mean of how long admitted work holds its budget, used for Retry-After.
+        self._hold_seconds = 5.0
+
+    def init_app(self, app):
+        self.global_budget = app.config.get('ADMISSION_GLOBAL_BUDGET', self.global_budget)
+        self.user_budget = app.config.get('ADMISSION_USER_BUDGET', self.user_budget)
+        self.queue_timeout = app.config.get('ADMISSION_QUEUE_TIMEOUT', self.queue_timeout)
+        self.max_waiting = app.config.get('ADMISSION_MAX_WAITING', self.max_waiting)
+
+    def _fits(self, cost, client):
+        # A request larger than a whole budget still runs, but only once nothing else holds that budget.
+        client_in_use = self._by_client.get(client, 0)
+        fits_global = self.in_use == 0 or self.in_use + cost <= self.global_budget
+        fits_user = client_in_use == 0 or client_in_use + cost <= self.user_budget
+        return fits_global, fits_user
+
+    def _retry_after(self):
+        return max(1, math.ceil(self._hold_seconds))
+
+    def acquire(self, cost, client):
+        with self._condition:
+            fits_global, fits_user = self._fits(cost, client)
+            if not (fits_global and fits_user):
+                if self.waiting >= self.max_waiting:
+                    self._reject('queue_full')
+                decisions_total.inc(decision='queued', reason='global' if not fits_global else 'user')
+                self.waiting += 1
+                deadline = time.monotonic() + self.queue_timeout
+                try:
+                    while not all(self._fits(cost, client)):
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            fits_global, _ = self._fits(cost, client)
+                            self._reject('global' if not fits_global else 'user')
+                        self._condition.wait(remaining)
+                finally:
+                    self.waiting -= 1
+            self.in_use += cost
+            self._by_client[client] = self._by_client.get(client, 0) + cost
+            decisions_total.inc(decision='admitted', reason='capacity')
+        return time.monotonic()
+
+    def _reject(self, reason):
+        decisions_total.inc(decision='rejected', reason=reason)
+        raise AdmissionRejected(reason, self._retry_after())
+
+    def release(self, cost, client, admitted_at):
+        with self._condition:
+            self.in_use -= cost
+            remaining = self._by_client.get(client, 0) - cost
+            if remaining > 0:
+                self._by_client[client] = remaining
+            else:
+                self._by_client.pop(client, None)
+            self._hold_seconds = 0.8 * self._hold_seconds + 0.2 * (time.monotonic() - admitted_at)
+            self._condition.notify_all()
+
+    @contextmanager
+    def admit(self, cost, client):
+        admitted_at = self.acquire(cost, client)
+        try:
+            yield
+        finally:
+            self.release(cost, client, admitted_at)
+
+    def stats(self):
+        with self._condition:
+            return {
+                'global_budget': self.global_budget,
+                'user_budget': self.user_budget,
+                'in_use': self.in_use,
+                'waiting': self.waiting,
+                'clients': len(self._by_client),
+                'retry_after': self._retry_after(),
+            }
+
+
+admission_controller = AdmissionController()
@@ -1,40 +1,67 @@
-import google.generativeai as genai
+import math
+import re
+import threading
+from collections import Counter
+
+from utils.cache import LRUCache
 
 # import time
 
 API_KEY = ''
-genai.configure(api_key=API_KEY)
-model = genai.GenerativeModel("tunedModels/yttranscriptionassistant-wdh9ly1qx7f9")
+MODEL_NAME = "tunedModels/yttranscriptionassistant-wdh9ly1qx7f9"
+FAQ_SIMILARITY_THRESHOLD = 0.75
+FAQ_WORD_WEIGHT = 2
+FAQ_STOPWORDS = {'a', 'an', 'the', 'i', 'is', 'to', 'how', 'what', 'whats', 's', 'can', 'my', 'do', 'does', 'for',
+                 'of', 'in', 'why', 'get', 'as', 'it', 'me', 'you', 'are', 'on', 'summary', 'video', 'videos'}
+_model = None
+_model_lock = threading.Lock()
+_faq_index = None
+_faq_vocabulary = set()
+response_cache = LRUCache(max_size=1024, ttl=24 * 3600)
+faq_stats = {'hits': 0, 'misses': 0}
+
+
+def get_model():
+    # Configured on first use so importing the app needs neither the SDK load nor network access.
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                import google.generativeai as genai
+                genai.configure(api_key=API_KEY)
+                _model = genai.GenerativeModel(MODEL_NAME)
+    return _model
+
 
 # base_model = "models/gemini-1.5-flash-001-tuning"
-# training_data = [
-#     {"text_input": "How to generate YouTube summary?",
-#      "output": "Paste YouTube URL > Choose extractive/abstractive > Generate"},
-#     {"text_input": "What's extractive summary?", "output": "Summary using key phrases from video transcript"},
-#     {"text_input": "What's abstractive summary?", "output": "Paraphrased summary generated from transcript"},
-#     {"text_input": "Can I download as PDF?", "output": "Yes - PDF available without login"},
-#     {"text_input": "How to get DOCX format?", "output": "Sign in required for DOCX/TXT/HTML downloads"},
-#     {"text_input": "Why can't I download TXT?", "output": "Non-PDF formats require account authentication"},
-#     {"text_input": "Is login needed for PDF?", "output": "No - PDF is free without account"},
-#     {"text_input": "How to change summary language?", "output": "Available after signing in (English/Hindi/Marathi)"},
-#     {"text_input": "Supported translation languages?", "output": "English, Hindi, Marathi (login required)"},
-#     {"text_input": "Why language option locked?", "output": "Activate by signing in to your account"},
-#     {"text_input": "Can I process Hindi videos?", "output": "Yes - supports English/Hindi/Marathi content"},
-#     {"text_input": "Maximum video duration?", "output": "Videos must be under 2 hours"},
-#     {"text_input": "Why was my video rejected?", "output": "Check: 1) ≤2 hours 2) EN/HI/MR language 3) Valid URL"},
-#     {"text_input": "Can I process 3 hour video?", "output": "No - maximum 2 hour limit"},
-#     {"text_input": "Why DOCX download failed?", "output": "Ensure you're logged in and retry"},
-#     {"text_input": "Is Marathi available for free?", "output": "All non-English requires signed-in account"},
-#     {"text_input": "How to access HTML exports?", "output": "Register/login to enable HTML downloads"},
-#     {"text_input": "Maximum summaries per day?", "output": "Free: 3/day. Login for unlimited"},
-#     {"text_input": "Why summary generation limit?", "output": "Free tier restriction - login to remove"},
-#     {"text_input": "Why PDF button missing?", "output": "First process valid YouTube URL"},
-#     {"text_input": "Why Hindi selection disabled?", "output": "Sign in to activate Hindi/Marathi"},
-#     {"text_input": "How to get English summary?", "output": "Default language - no login required"},
-#     {"text_input": "Can I translate Hindi to Marathi?", "output": "Yes - available after account login"},
-#     {"text_input": "Video language requirements?", "output": "Supports English/Hindi/Marathi audio/subtitles"},
-#     {"text_input": "How long does summary take?", "output": "Typically 15-30 seconds after URL validation"}
-# ]
+training_data = [
+    {"text_input": "How to generate YouTube summary?",
+     "output": "Paste YouTube URL > Choose extractive/abstractive > Generate"},
+    {"text_input": "What's extractive summary?", "output": "Summary using key phrases from video transcript"},
+    {"text_input": "What's abstractive summary?", "output": "Paraphrased summary generated from transcript"},
+    {"text_input": "Can I download as PDF?", "output": "Yes - PDF available without login"},
+    {"text_input": "How to get DOCX format?", "output": "Sign in required for DOCX/TXT/HTML downloads"},
+    {"text_input": "Why can't I download TXT?", "output": "Non-PDF formats require account authentication"},
+    {"text_input": "Is login needed for PDF?", "output": "No - PDF is free without account"},
+    {"text_input": "How to change summary language?", "output": "Available after signing in (English/Hindi/Marathi)"},
+    {"text_input": "Supported translation languages?", "output": "English, Hindi, Marathi (login required)"},
+    {"text_input": "Why language option locked?", "output": "Activate by signing in to your account"},
+    {"text_input": "Can I process Hindi videos?", "output": "Yes - supports English/Hindi/Marathi content"},
+    {"text_input": "Maximum video duration?", "output": "Videos must be under 2 hours"},
+    {"text_input": "Why was my video rejected?", "output": "Check: 1) ≤2 hours 2) EN/HI/MR language 3) Valid URL"},
+    {"text_input": "Can I process 3 hour video?", "output": "No - maximum 2 hour limit"},
+    {"text_input": "Why DOCX download failed?", "output": "Ensure you're logged in and retry"},
+    {"text_input": "Is Marathi available for free?", "output": "All non-English requires signed-in account"},
+    {"text_input": "How to access HTML exports?", "output": "Register/login to enable HTML downloads"},
+    {"text_input": "Maximum summaries per day?", "output": "Free: 3/day. Login for unlimited"},
+    {"text_input": "Why summary generation limit?", "output": "Free tier restriction - login to remove"},
+    {"text_input": "Why PDF button missing?", "output": "First process valid YouTube URL"},
+    {"text_input": "Why Hindi selection disabled?", "output": "Sign in to activate Hindi/Marathi"},
+    {"text_input": "How to get English summary?", "output": "Default language - no login required"},
+    {"text_input": "Can I translate Hindi to Marathi?", "output": "Yes - available after account login"},
+    {"text_input": "Video language requirements?", "output": "Supports English/Hindi/Marathi audio/subtitles"},
+    {"text_input": "How long does summary take?", "output": "Typically 15-30 seconds after URL validation"}
+]
 #
 # operation = genai.create_tuned_model(
 #     display_name="yt-transcription-assistant",
@@ -50,14 +77,82 @@ model = genai.GenerativeModel("tunedModels/yttranscriptionassistant-wdh9ly1qx7f9
 #
 # result = operation.result()
 
-for m in genai.list_tuned_models():
-    print(m.name)
+
+def normalize_question(text):
+    text = re.sub(r"[^\w\s]", ' ', text.lower())
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def embed_question(text):
+    # Character trigrams tolerate typos and inflections; whole words are added on top so that
+    # distinguishing terms weigh more than shared phrasing.
+    normalized = normalize_question(text)
+    padded = f' {normalized} '
+    counts = Counter(padded[i:i + 3] for i in range(len(padded) - 2))
+    for word in normalized.split():
+        counts[f'w:{word}'] += FAQ_WORD_WEIGHT
+    norm = math.sqrt(sum(v * v for v in counts.values())) or 1.0
+    return {gram: v / norm for gram, v in counts.items()}
+
+
+def _get_faq_index():
+    global _faq_index, _faq_vocabulary
+    if _faq_index is None:
+        _faq_vocabulary = {word for item in training_data for word in normalize_question(item['text_input']).split()}
+        _faq_index = [
+            (embed_question(item['text_input']), set(normalize_question(item['text_input']).split()), item['output'])
+            for item in training_data
+        ]
+    return _faq_index
+
+
+def _key_terms(words):
+    # Numbers and words the FAQ uses to tell entries apart (pdf vs docx, hindi vs marathi) must match exactly.
+    return {word for word in words if word not in FAQ_STOPWORDS and (word.isdigit() or word in _faq_vocabulary)}
+
+
+def find_faq_answer(text_input, threshold=FAQ_SIMILARITY_THRESHOLD):
+    index = _get_faq_index()
+    query = embed_question(text_input)
+    key_terms = _key_terms(normalize_question(text_input).split())
+    best_score = 0.0
+    best_answer = None
+    for vector, words, answer in index:
+        score = sum(v * vector.get(gram, 0.0) for gram, v in query.items())
+        if score > best_score and key_terms <= words:
+            best_score = score
+            best_answer = answer
+    return best_answer if best_score >= threshold else None
+
+
+def _remote_generate(text_input):
+    return get_model().generate_content(text_input).text
+
+
+remote_generate = _remote_generate
+
+
+def set_remote(generate):
+    global remote_generate
+    remote_generate = generate or _remote_generate
 
 
 def assistant_response(text_input):
+    if not isinstance(text_input, str) or not text_input.strip():
+        return "Could not process the response. Please rephrase your question."
+    answer = find_faq_answer(text_input)
+    if answer is not None:
+        faq_stats['hits'] += 1
+        return answer
+    faq_stats['misses'] += 1
+    key = normalize_question(text_input)
+    cached = response_cache.get(key)
+    if cached is not None:
+        return cached
     try:
-        response = model.generate_content(text_input)
-        return response.text
+        response = remote_generate(text_input)
+        response_cache.set(key, response)
+        return response
     except (AttributeError, IndexError, KeyError) as e:
         print(f"Response parsing error: {e}")
         return "Could not process the response. Please rephrase your question."
@@ -0,0 +1,45 @@
+import argparse
+import json
+import random
+import time
+
+import assistant
+from benchmarks.pipeline_benchmark import measure
+
+PARAPHRASES = [
+    'can i download as pdf', 'What is an extractive summary?', 'maximum video duration',
+    'Is login needed for a PDF', 'What is abstractive summary', 'how long does the summary take',
+    'Which languages are supported for translation?', 'How to get a DOCX format', 'why was my video rejected',
+]
+OPEN_QUESTIONS = ['Does it work with playlists?', 'Can I summarize a podcast?', 'Is there a mobile app?']
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Assistant latency for FAQ hits, cached remote answers and misses.')
+    parser.add_argument('--latency', type=float, default=0.8, help='seconds the stub remote model takes')
+    parser.add_argument('--iterations', type=int, default=200)
+    args = parser.parse_args()
+
+    remote_calls = []
+
+    def stub_remote(text_input):
+        remote_calls.append(text_input)
+        time.sleep(args.latency)
+        return f'Remote answer to: {text_input}'
+
+    assistant.set_remote(stub_remote)
+    rng = random.Random(0)
+    report = {
+        'faq_hit': measure(lambda: assistant.assistant_response(rng.choice(PARAPHRASES)), args.iterations),
+        'remote_miss': measure(lambda: (assistant.response_cache.clear(),
+                                        assistant.assistant_response(rng.choice(OPEN_QUESTIONS))), 3, warmup=0),
+        'remote_cached': measure(lambda: assistant.assistant_response(rng.choice(OPEN_QUESTIONS)), args.iterations),
+    }
+    report['remote_calls'] = len(remote_calls)
+    report['response_cache'] = assistant.response_cache.stats()
+    assistant.set_remote(None)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
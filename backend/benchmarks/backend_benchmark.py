@@ -0,0 +1,100 @@
+import argparse
+import json
+import multiprocessing
+import time
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+from benchmarks.fixtures import make_sentences
+
+
+def lcs_f1(candidate, reference):
+    a = candidate.split()
+    b = reference.split()
+    if not a or not b:
+        return 0.0
+    previous = [0] * (len(b) + 1)
+    for token in a:
+        current = [0]
+        for j, other in enumerate(b):
+            current.append(previous[j] + 1 if token == other else max(previous[j + 1], current[j]))
+        previous = current
+    lcs = previous[-1]
+    if lcs == 0:
+        return 0.0
+    precision = lcs / len(a)
+    recall = lcs / len(b)
+    return 2 * precision * recall / (precision + recall)
+
+
+def _run(backend, texts, sentences, queue):
+    import numpy as np
+    from utils.summarization import TextSummarizer
+    summarizer = TextSummarizer(backend=backend)
+    start = time.perf_counter()
+    embeddings = summarizer.embed_sentences(sentences)
+    embed_seconds = time.perf_counter() - start
+    summaries = []
+    generated_tokens = 0
+    start = time.perf_counter()
+    for text in texts:
+        summary = summarizer.get_abstractive_summary(text)
+        summaries.append(summary)
+        generated_tokens += len(summarizer.tokenizer_mt5(summary)['input_ids'])
+    generate_seconds = time.perf_counter() - start
+    input_tokens = sum(len(ids) for ids in summarizer.tokenizer_bert(sentences)['input_ids'])
+    queue.put({
+        'backend': backend,
+        'embedding_tokens_per_second': round(input_tokens / embed_seconds, 1),
+        'generated_tokens_per_second': round(generated_tokens / generate_seconds, 1),
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1) if resource else None,
+        'summaries': summaries,
+        'embeddings': np.asarray(embeddings).tolist(),
+    })
+
+
+def run_isolated(backend, texts, sentences):
+    ctx = multiprocessing.get_context('spawn')
+    queue = ctx.Queue()
+    process = ctx.Process(target=_run, args=(backend, texts, sentences, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def compare(result, baseline):
+    import numpy as np
+    a = np.asarray(result['embeddings'])
+    b = np.asarray(baseline['embeddings'])
+    cosine = (a * b).sum(axis=1) / (np.linalg.norm(a, axis=1) * np.linalg.norm(b, axis=1))
+    return {
+        'summary_lcs_f1_vs_fp32': round(sum(lcs_f1(x, y) for x, y in zip(result['summaries'], baseline['summaries']))
+                                        / len(baseline['summaries']), 3),
+        'embedding_cosine_vs_fp32': round(float(cosine.mean()), 4),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Speed, memory and fp32 agreement for each inference backend.')
+    parser.add_argument('--backends', nargs='+', default=['torch', 'quantized', 'onnx'])
+    parser.add_argument('--texts', type=int, default=3)
+    parser.add_argument('--sentences', type=int, default=200)
+    args = parser.parse_args()
+    texts = [' '.join(make_sentences(40, seed=i)) for i in range(args.texts)]
+    sentences = make_sentences(args.sentences)
+    baseline = run_isolated('torch', texts, sentences)
+    report = []
+    for backend in args.backends:
+        result = baseline if backend == 'torch' else run_isolated(backend, texts, sentences)
+        entry = {k: v for k, v in result.items() if k not in ('embeddings', 'summaries')}
+        entry.update(compare(result, baseline))
+        report.append(entry)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
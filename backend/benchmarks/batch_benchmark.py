@@ -0,0 +1,59 @@
+import argparse
+import json
+import time
+
+from benchmarks.fixtures import LENGTHS
+from benchmarks.pipeline_benchmark import install_stubs, reset_caches
+
+
+def run(mode, video_urls, languages, num_sentences):
+    from caching import summary_cache
+    from pipeline import iter_batch_summary, run_summary
+    reset_caches()
+    summary_cache.clear()
+    start = time.perf_counter()
+    completed = 0
+    if mode == 'sequential':
+        for video_url in video_urls:
+            run_summary(languages, video_url, num_sentences)
+            completed += 1
+    else:
+        for event in iter_batch_summary(video_urls, languages, num_sentences):
+            completed += event['status'] == 'done'
+    elapsed = time.perf_counter() - start
+    return {
+        'mode': mode,
+        'videos': completed,
+        'seconds': round(elapsed, 2),
+        'videos_per_minute': round(completed / elapsed * 60, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Videos per minute: sequential /summary calls vs /summary/batch.')
+    parser.add_argument('--videos', type=int, default=8)
+    parser.add_argument('--length', choices=sorted(LENGTHS), default='short')
+    parser.add_argument('--languages', nargs='+', default=['en', 'hi'])
+    parser.add_argument('--num-sentences', type=int, default=5)
+    parser.add_argument('--latency', type=float, default=0.2, help='seconds injected into each stub network call')
+    args = parser.parse_args()
+
+    from __init__ import create_app, db
+    app = create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite://'})
+    video_urls = [f'https://www.youtube.com/watch?v=batch{i:06d}' for i in range(args.videos)]
+    with app.app_context():
+        db.create_all()
+        install_stubs(args.length, args.latency)
+        from utils.summarization import get_summarizer
+        get_summarizer()
+        sequential = run('sequential', video_urls, args.languages, args.num_sentences)
+        batched = run('batched', video_urls, args.languages, args.num_sentences)
+    print(json.dumps({
+        'sequential': sequential,
+        'batched': batched,
+        'speedup': round(batched['videos_per_minute'] / sequential['videos_per_minute'], 2),
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
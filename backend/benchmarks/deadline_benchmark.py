@@ -0,0 +1,33 @@
+import argparse
+import json
+import time
+
+from benchmarks.fixtures import LENGTHS, make_transcript
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Abstractive latency and decoding choice under latency budgets.')
+    parser.add_argument('--length', choices=sorted(LENGTHS), default='medium')
+    parser.add_argument('--budgets-ms', type=int, nargs='+', default=[0, 30000, 10000, 3000, 1000],
+                        help='0 means no budget')
+    args = parser.parse_args()
+
+    from utils.summarization import TextSummarizer
+    summarizer = TextSummarizer()
+    text = make_transcript(args.length)
+    # One unbudgeted run calibrates the per-token estimate the budgeted runs plan with.
+    summarizer.get_abstractive_summary_within(text)
+    results = []
+    for budget_ms in args.budgets_ms:
+        deadline = time.time() + budget_ms / 1000 if budget_ms else None
+        result = summarizer.get_abstractive_summary_within(text, deadline)
+        decoding = result['decoding']
+        decoding['overshoot_ms'] = None if not budget_ms else round(decoding['seconds'] * 1000 - budget_ms)
+        decoding['summary_chars'] = len(result['summary'])
+        results.append(decoding)
+    print(json.dumps({'length': args.length, 'step_seconds': round(summarizer.step_seconds, 5),
+                      'runs': results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
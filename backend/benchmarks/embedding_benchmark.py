@@ -0,0 +1,75 @@
+import argparse
+import json
+import multiprocessing
+import time
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+from benchmarks.fixtures import make_sentences
+
+
+def legacy_embed(summarizer, sentences):
+    import torch
+    embeddings = []
+    for sent in sentences:
+        inputs = summarizer.tokenizer_bert(sent, return_tensors='pt', truncation=True, max_length=512)
+        inputs = {k: v.to(summarizer.device) for k, v in inputs.items()}
+        with torch.no_grad():
+            outputs = summarizer.model_bert(**inputs)
+        embeddings.append(torch.mean(outputs.logits[0], dim=0).cpu().data.numpy())
+    return embeddings
+
+
+def _run(mode, count, batch_size, queue):
+    from utils.summarization import TextSummarizer
+    summarizer = TextSummarizer(embedding_batch_size=batch_size)
+    sentences = make_sentences(count)
+    baseline_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024 if resource else None
+    start = time.perf_counter()
+    if mode == 'legacy':
+        legacy_embed(summarizer, sentences)
+    else:
+        summarizer.embed_sentences(sentences)
+    elapsed = time.perf_counter() - start
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024 if resource else None
+    queue.put({
+        'mode': mode,
+        'sentences': count,
+        'batch_size': batch_size if mode == 'batched' else 1,
+        'seconds': round(elapsed, 3),
+        'sentences_per_second': round(count / elapsed, 1),
+        'peak_rss_mb': None if peak_rss is None else round(peak_rss, 1),
+        'peak_rss_over_models_mb': None if peak_rss is None else round(peak_rss - baseline_rss, 1),
+    })
+
+
+def run_isolated(mode, count, batch_size):
+    # Each mode runs in a fresh process so peak RSS is not shared between them.
+    ctx = multiprocessing.get_context('spawn')
+    queue = ctx.Queue()
+    process = ctx.Process(target=_run, args=(mode, count, batch_size, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare per-sentence and batched BERT sentence embedding.')
+    parser.add_argument('--sentences', type=int, default=500)
+    parser.add_argument('--batch-size', type=int, nargs='+', default=[8, 32, 64])
+    parser.add_argument('--skip-legacy', action='store_true')
+    args = parser.parse_args()
+    results = []
+    if not args.skip_legacy:
+        results.append(run_isolated('legacy', args.sentences, 1))
+    for batch_size in args.batch_size:
+        results.append(run_isolated('batched', args.sentences, batch_size))
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
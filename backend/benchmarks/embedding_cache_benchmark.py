@@ -0,0 +1,54 @@
+import argparse
+import json
+import time
+
+from benchmarks.fixtures import make_sentences
+
+BOILERPLATE = [
+    'Hey everyone, welcome back to the channel.',
+    'Before we start, this video is sponsored by our friends at Example VPN.',
+    'Use the link in the description to get two months free.',
+    "If you enjoyed this video, don't forget to like and subscribe.",
+    'Thanks for watching and see you in the next one.',
+]
+
+
+def video_sentences(count, seed, boilerplate_share):
+    # Related videos from one channel share their intro/outro and sponsor reads.
+    repeats = int(count * boilerplate_share)
+    boilerplate = [BOILERPLATE[i % len(BOILERPLATE)] for i in range(repeats)]
+    return boilerplate + make_sentences(count - repeats, seed=seed)
+
+
+def timed_embed(summarizer, sentences):
+    start = time.perf_counter()
+    summarizer.embed_sentences(sentences)
+    return round(time.perf_counter() - start, 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Sentence embedding time with a cold, related and warm cache.')
+    parser.add_argument('--sentences', type=int, default=400)
+    parser.add_argument('--boilerplate-share', type=float, default=0.3)
+    parser.add_argument('--spill', default=None, help='path for the memory-mapped spill file')
+    args = parser.parse_args()
+
+    from utils.embedding_cache import EmbeddingCache
+    from utils.summarization import TextSummarizer
+    cache = EmbeddingCache(spill_path=args.spill)
+    uncached = TextSummarizer(embedding_cache=None)
+    cached = TextSummarizer(embedding_cache=cache)
+    first = video_sentences(args.sentences, 0, args.boilerplate_share)
+    related = video_sentences(args.sentences, 1, args.boilerplate_share)
+    report = {
+        'uncached_seconds': timed_embed(uncached, first),
+        'cold_seconds': timed_embed(cached, first),
+        'rerun_seconds': timed_embed(cached, first),
+        'related_video_seconds': timed_embed(cached, related),
+        'cache': cache.stats(),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+import math
+import os
+import random
+import struct
+import wave
+from types import SimpleNamespace
+
+VOCABULARY = {
+    'en': ('video transcript model summary language speaker topic example people today question answer '
+           'important because really going start first next finally learn build simple data result').split(),
+    'hi': ('वीडियो भाषा सारांश उदाहरण लोग आज प्रश्न उत्तर महत्वपूर्ण क्योंकि पहले अगला अंत में सीखना '
+           'परिणाम डेटा सरल विषय वक्ता').split(),
+    'mr': ('व्हिडिओ भाषा सारांश उदाहरण लोक आज प्रश्न उत्तर महत्त्वाचे कारण प्रथम पुढील शेवटी शिकणे '
+           'निकाल डेटा सोपे विषय वक्ता').split(),
+}
+
+# Transcript lengths in minutes; caption tracks average roughly 20 segments per minute.
+LENGTHS = {'short': 5, 'medium': 30, 'long': 120}
+SEGMENTS_PER_MINUTE = 20
+
+
+def make_segments(count, lang='en', seed=0):
+    rng = random.Random(f'{lang}-{seed}-{count}')
+    words = VOCABULARY.get(lang, VOCABULARY['en'])
+    segments = []
+    for i in range(count):
+        text = ' '.join(rng.choice(words) for _ in range(rng.randint(6, 14)))
+        segments.append(SimpleNamespace(text=text + '.', start=i * 3.0, duration=3.0))
+    return segments
+
+
+def make_transcript(length='short', lang='en', seed=0):
+    segments = make_segments(LENGTHS[length] * SEGMENTS_PER_MINUTE, lang, seed)
+    return ' '.join(segment.text for segment in segments)
+
+
+def make_sentences(count, lang='en', seed=0):
+    return [segment.text for segment in make_segments(count, lang, seed)]
+
+
+def write_audio(path, seconds, sample_rate=16000, seed=0):
+    # A speech-band tone with noise: enough to exercise decoding and windowing without shipping binaries.
+    rng = random.Random(seed)
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with wave.open(path, 'wb') as handle:
+        handle.setnchannels(1)
+        handle.setsampwidth(2)
+        handle.setframerate(sample_rate)
+        block = sample_rate
+        for offset in range(0, int(seconds * sample_rate), block):
+            frames = bytearray()
+            for n in range(offset, min(offset + block, int(seconds * sample_rate))):
+                value = 0.3 * math.sin(2 * math.pi * 220 * n / sample_rate) + 0.05 * (rng.random() - 0.5)
+                frames += struct.pack('<h', int(value * 32767))
+            handle.writeframes(bytes(frames))
+    return path
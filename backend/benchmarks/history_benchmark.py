@@ -0,0 +1,60 @@
+import argparse
+import json
+
+from __init__ import create_app, db
+from benchmarks.pipeline_benchmark import measure
+from models import DownloadHistory, SearchHistory, User
+
+
+def seed(rows):
+    user = User(username='bench', email='bench@example.com', password_hash='x')
+    db.session.add(user)
+    db.session.commit()
+    db.session.bulk_insert_mappings(SearchHistory, [
+        {'user_id': user.id, 'query': f'https://www.youtube.com/watch?v={i:011d}'} for i in range(rows)
+    ])
+    db.session.bulk_insert_mappings(DownloadHistory, [
+        {'user_id': user.id, 'item': f'summary-{i}.pdf'} for i in range(rows)
+    ])
+    db.session.commit()
+    return user.id
+
+
+def walk_pages(user, limit, pages):
+    cursor = None
+    for _ in range(pages):
+        _, cursor = user.get_search_page(cursor, limit)
+        if cursor is None:
+            break
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Profile and history latency against a large history table.')
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--iterations', type=int, default=20)
+    parser.add_argument('--page-size', type=int, default=20)
+    args = parser.parse_args()
+
+    app = create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite://'})
+    with app.app_context():
+        db.create_all()
+        user_id = seed(args.rows)
+
+        def fresh_user():
+            # Expire the identity map so every run pays for its own loads, as a new request would.
+            db.session.expire_all()
+            return db.session.get(User, user_id)
+
+        report = {
+            'rows': args.rows,
+            'full_history_load': measure(lambda: (fresh_user().get_search_history(),
+                                                  fresh_user().get_download_history()), args.iterations),
+            'profile': measure(lambda: fresh_user().get_profile(), args.iterations),
+            'first_page': measure(lambda: fresh_user().get_search_page(None, args.page_size), args.iterations),
+            'tenth_page': measure(lambda: walk_pages(fresh_user(), args.page_size, 10), args.iterations),
+        }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+
+from __init__ import create_app, db
+from history import history_writer
+from models import SearchHistory, User
+
+MODES = {
+    'per_request_commit': {'HISTORY_WRITE_BEHIND': False, 'SQLITE_WAL': False},
+    'write_behind_wal': {'HISTORY_WRITE_BEHIND': True, 'SQLITE_WAL': True},
+}
+
+
+def run_mode(name, config, threads, inserts):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'history.sqlite3')
+        app = create_app(dict(config, SQLALCHEMY_DATABASE_URI=f'sqlite:///{path}'))
+        with app.app_context():
+            db.create_all()
+            user = User(username='bench', email='bench@example.com', password_hash='x')
+            db.session.add(user)
+            db.session.commit()
+            user_id = user.id
+
+        def client(worker):
+            # Each worker mimics a stream of /search requests, each with its own app context and session.
+            for i in range(inserts):
+                with app.app_context():
+                    db.session.get(User, user_id).add_search(f'https://www.youtube.com/watch?v={worker:04d}{i:07d}')
+
+        workers = [threading.Thread(target=client, args=(w,)) for w in range(threads)]
+        start = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        accepted = time.perf_counter() - start
+        history_writer.flush()
+        durable = time.perf_counter() - start
+        with app.app_context():
+            rows = db.session.query(SearchHistory).count()
+            journal_mode = db.session.execute(db.text('PRAGMA journal_mode')).scalar()
+        total = threads * inserts
+        return {
+            'rows': rows,
+            'journal_mode': journal_mode,
+            'accepted_seconds': round(accepted, 3),
+            'durable_seconds': round(durable, 3),
+            'inserts_per_s': round(total / durable, 1),
+            'writer': history_writer.stats(),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='History insert throughput with per-request commits vs write-behind.')
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--inserts', type=int, default=250, help='inserts per thread')
+    args = parser.parse_args()
+
+    report = {name: run_mode(name, config, args.threads, args.inserts) for name, config in MODES.items()}
+    history_writer.shutdown()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
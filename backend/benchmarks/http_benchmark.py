@@ -0,0 +1,98 @@
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from benchmarks.pipeline_benchmark import measure
+from utils.http_client import get_session, make_session
+from utils.youtube import fetch_video_length, video_length_cache
+
+VIDEO_ID = 'benchmark01'
+WATCH_PAGE = ('<html><script>var ytInitialPlayerResponse = {"videoDetails": {"videoId": "%s", '
+              '"title": "Benchmark video", "lengthSeconds": "%d"}};</script>%s</html>')
+
+
+class StubYouTubeHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    connections = 0
+    requests = 0
+    connect_latency = 0.0
+    latency = 0.0
+    padding = ''
+
+    def setup(self):
+        super().setup()
+        # Stands in for the TCP + TLS handshake a fresh connection to YouTube pays.
+        type(self).connections += 1
+        time.sleep(self.connect_latency)
+
+    def do_GET(self):
+        type(self).requests += 1
+        time.sleep(self.latency)
+        body = (WATCH_PAGE % (VIDEO_ID, 600, self.padding)).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def counted(fn, iterations):
+    StubYouTubeHandler.connections = 0
+    StubYouTubeHandler.requests = 0
+    result = measure(fn, iterations, warmup=0)
+    result['connections'] = StubYouTubeHandler.connections
+    result['requests'] = StubYouTubeHandler.requests
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Metadata fetches with fresh connections vs the pooled session.')
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--connect-latency', type=float, default=0.03, help='simulated handshake seconds')
+    parser.add_argument('--latency', type=float, default=0.01)
+    parser.add_argument('--page-kb', type=int, default=500, help='watch page size')
+    args = parser.parse_args()
+
+    StubYouTubeHandler.connect_latency = args.connect_latency
+    StubYouTubeHandler.latency = args.latency
+    StubYouTubeHandler.padding = 'x' * (args.page_kb * 1024)
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubYouTubeHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    watch_url = f'http://127.0.0.1:{server.server_port}/watch?v={{video_id}}'
+    pooled = make_session()
+
+    def fresh_connection():
+        video_length_cache.clear()
+        with requests.Session() as session:
+            fetch_video_length(VIDEO_ID, session, watch_url)
+
+    def pooled_session():
+        video_length_cache.clear()
+        fetch_video_length(VIDEO_ID, pooled, watch_url)
+
+    def combined_fetch():
+        # The transcript client's watch-page fetch goes through the shared session, whose hook records
+        # the length, so the metadata lookup that follows is a cache hit.
+        video_length_cache.clear()
+        get_session().get(watch_url.format(video_id=VIDEO_ID))
+        assert fetch_video_length(VIDEO_ID, get_session(), watch_url) == 600
+
+    report = {
+        'fresh_connection': counted(fresh_connection, args.iterations),
+        'pooled_session': counted(pooled_session, args.iterations),
+        'transcript_plus_metadata_combined': counted(combined_fetch, args.iterations),
+        'pooled_session_stats': pooled.stats(),
+    }
+    server.shutdown()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
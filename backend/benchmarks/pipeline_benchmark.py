@@ -0,0 +1,195 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+from benchmarks.fixtures import LENGTHS, SEGMENTS_PER_MINUTE, make_transcript, write_audio
+from benchmarks.startup import profile_startup
+from benchmarks.stubs import StubTranscriptApi, StubYouTube
+
+STAGES = ('transcripts', 'extractive', 'abstractive', 'endpoints', 'asr')
+VIDEO_URL = 'https://www.youtube.com/watch?v=benchmark01'
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, int(round(q / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def measure(fn, iterations, warmup=1):
+    for _ in range(warmup):
+        fn()
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return {
+        'iterations': iterations,
+        'mean_ms': round(sum(timings) / len(timings) * 1000, 2),
+        'p50_ms': round(percentile(timings, 50) * 1000, 2),
+        'p90_ms': round(percentile(timings, 90) * 1000, 2),
+        'p99_ms': round(percentile(timings, 99) * 1000, 2),
+        'throughput_per_s': round(len(timings) / sum(timings), 3),
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+def install_stubs(length, latency, audio_path=None):
+    from utils import transcription
+    api = StubTranscriptApi(segments_per_video=LENGTHS[length] * SEGMENTS_PER_MINUTE, latency=latency,
+                            list_latency=latency)
+    transcription.YouTubeTranscriptApi = lambda *args, **kwargs: api
+    transcription.YouTube = StubYouTube.configure(length=LENGTHS[length] * 60, audio_path=audio_path,
+                                                  latency=latency)
+    # Without a watch page to parse, lengths come from the stubbed pytubefix fallback.
+    transcription.fetch_video_length = lambda video_id, session: None
+    return api
+
+
+def reset_caches():
+    from caching import summary_cache
+    from utils import transcription
+    transcription.transcript_list_cache.clear()
+    transcription.transcript_cache.clear()
+    transcription.video_length_cache.clear()
+    summary_cache.memory.clear()
+
+
+def bench_transcripts(args, results):
+    from utils.transcription import Transcription
+    for length in args.lengths:
+        install_stubs(length, args.latency)
+
+        def run():
+            reset_caches()
+            Transcription(VIDEO_URL, args.languages).get_transcripts()
+
+        results[f'transcripts/{length}'] = measure(run, args.iterations)
+
+
+def bench_summarizer(args, results):
+    from utils.summarization import get_summarizer
+    summarizer = get_summarizer()
+    for length in args.lengths:
+        for lang in args.languages:
+            text = make_transcript(length, lang)
+            if 'extractive' in args.stages:
+                results[f'extractive/{length}/{lang}'] = measure(
+                    lambda: summarizer.get_extractive_summary(text, args.num_sentences), args.iterations)
+            if 'abstractive' in args.stages:
+                results[f'abstractive/{length}/{lang}'] = measure(
+                    lambda: summarizer.get_abstractive_summary(text), args.iterations)
+
+
+def bench_endpoints(args, results):
+    from __init__ import create_app, db
+    from caching import summary_cache
+    app = create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite://'})
+    client = app.test_client()
+    with app.app_context():
+        db.create_all()
+    for length in args.lengths:
+        install_stubs(length, args.latency)
+        for path, body in (('/summary/english', {'video_url': VIDEO_URL, 'num_sentences': args.num_sentences}),
+                           ('/summary/all', {'video_url': VIDEO_URL, 'languages': args.languages,
+                                             'num_sentences': args.num_sentences})):
+            def run():
+                reset_caches()
+                with app.app_context():
+                    summary_cache.clear()
+                response = client.post(path, json=body)
+                if response.status_code != 200:
+                    raise RuntimeError(f'{path} returned {response.status_code}: {response.get_data(as_text=True)}')
+
+            results[f'endpoint{path}/{length}'] = measure(run, args.iterations)
+            results[f'endpoint{path}/{length}/cached'] = measure(lambda: client.post(path, json=body),
+                                                                 args.iterations)
+
+
+def bench_asr(args, results):
+    from utils.transcription import Transcription
+    workdir = tempfile.mkdtemp(prefix='yt-bench-audio-')
+    for length in args.lengths:
+        audio_path = write_audio(os.path.join(workdir, f'{length}.wav'), args.asr_seconds or LENGTHS[length] * 60)
+        install_stubs(length, args.latency, audio_path)
+        results[f'asr/{length}'] = measure(
+            lambda: Transcription(VIDEO_URL, ['en']).transcribe_with_speech_to_text(), args.iterations, warmup=0)
+
+
+def compare(current, baseline):
+    deltas = {}
+    for key, stats in current.items():
+        previous = baseline.get(key)
+        if previous:
+            deltas[key] = {
+                'p50_change_pct': round((stats['p50_ms'] - previous['p50_ms']) / previous['p50_ms'] * 100, 1),
+                'p99_change_pct': round((stats['p99_ms'] - previous['p99_ms']) / previous['p99_ms'] * 100, 1),
+            }
+    return deltas
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline per-stage benchmark of the summary pipeline.')
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=['transcripts', 'extractive', 'endpoints'])
+    parser.add_argument('--lengths', nargs='+', choices=sorted(LENGTHS), default=['short', 'medium'])
+    parser.add_argument('--languages', nargs='+', default=['en', 'hi', 'mr'])
+    parser.add_argument('--num-sentences', type=int, default=5)
+    parser.add_argument('--iterations', type=int, default=5)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds injected into each stub network call')
+    parser.add_argument('--asr-seconds', type=float, default=None, help='override the audio fixture length')
+    parser.add_argument('--output', default=None, help='where to write the JSON report')
+    parser.add_argument('--compare', default=None, help='previous JSON report to diff against')
+    parser.add_argument('--skip-startup', action='store_true', help='skip the import-time profile')
+    args = parser.parse_args()
+
+    # Profile startup first, in a subprocess, before this process imports anything heavy.
+    startup = None if args.skip_startup else profile_startup()
+    results = {}
+    if 'transcripts' in args.stages:
+        bench_transcripts(args, results)
+    if 'extractive' in args.stages or 'abstractive' in args.stages:
+        bench_summarizer(args, results)
+    if 'endpoints' in args.stages:
+        bench_endpoints(args, results)
+    if 'asr' in args.stages:
+        bench_asr(args, results)
+
+    report = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'args': vars(args),
+        },
+        'startup': startup,
+        'results': results,
+    }
+    if args.compare:
+        with open(args.compare) as handle:
+            report['comparison'] = compare(results, json.load(handle)['results'])
+    output = args.output or os.path.join('benchmarks', 'results', f"pipeline-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w') as handle:
+        json.dump(report, handle, indent=2)
+    print(json.dumps(report, indent=2))
+    print(f'Saved to {output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+import json
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ('torch', 'transformers', 'librosa', 'spacy', 'sklearn', 'nltk', 'pytubefix',
+                 'google.generativeai')
+
+_PROBE = '''
+import json, sys, time
+start = time.perf_counter()
+import routes
+imported = time.perf_counter()
+from __init__ import create_app
+create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite://'})
+created = time.perf_counter()
+print(json.dumps({
+    'import_routes_seconds': round(imported - start, 3),
+    'create_app_seconds': round(created - imported, 3),
+    'heavy_modules_loaded': [name for name in %r if name in sys.modules],
+}))
+'''
+
+
+def profile_startup(top=15):
+    # A fresh interpreter each time so nothing is already in sys.modules.
+    probe = subprocess.run([sys.executable, '-c', _PROBE % (HEAVY_MODULES,)], cwd=BACKEND_DIR,
+                           capture_output=True, text=True)
+    if probe.returncode != 0:
+        return {'error': probe.stderr.strip().splitlines()[-1:]}
+    result = json.loads(probe.stdout.strip().splitlines()[-1])
+    importtime = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import routes'], cwd=BACKEND_DIR,
+                                capture_output=True, text=True)
+    entries = []
+    for line in importtime.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        entries.append((int(cumulative_us), name.strip()))
+    entries.sort(reverse=True)
+    result['slowest_imports_ms'] = {name: round(cumulative / 1000, 1) for cumulative, name in entries[:top]}
+    return result
+
+
+if __name__ == '__main__':
+    print(json.dumps(profile_startup(), indent=2))
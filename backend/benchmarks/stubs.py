@@ -0,0 +1,117 @@
+import os
+import shutil
+import time
+from types import SimpleNamespace
+
+from youtube_transcript_api import NoTranscriptFound
+
+from benchmarks.fixtures import make_segments
+
+
+class StubTranscript:
+    def __init__(self, video_id, language_code, is_generated, segments, latency=0.0,
+                 translation_languages=('hi', 'mr')):
+        self.video_id = video_id
+        self.language_code = language_code
+        self.is_generated = is_generated
+        self.segments = segments
+        self.latency = latency
+        self.translation_languages = [SimpleNamespace(language_code=code) for code in translation_languages]
+
+    def fetch(self):
+        time.sleep(self.latency)
+        return list(self.segments)
+
+    def translate(self, language_code):
+        time.sleep(self.latency)
+        translated = [SimpleNamespace(text=f"[{language_code}] {s.text}", start=s.start, duration=s.duration)
+                      for s in self.segments]
+        return StubTranscript(self.video_id, language_code, True, translated, self.latency, ())
+
+
+class StubTranscriptList:
+    def __init__(self, video_id, manual=None, generated=None):
+        self.video_id = video_id
+        self._manually_created_transcripts = manual or {}
+        self._generated_transcripts = generated or {}
+        self._translation_languages = [
+            tl for t in self for tl in t.translation_languages
+        ]
+
+    def __iter__(self):
+        return iter(list(self._manually_created_transcripts.values()) + list(self._generated_transcripts.values()))
+
+    def _find(self, language_codes, sources):
+        for code in language_codes:
+            for source in sources:
+                if code in source:
+                    return source[code]
+        raise NoTranscriptFound(self.video_id, language_codes, self)
+
+    def find_transcript(self, language_codes):
+        return self._find(language_codes, [self._manually_created_transcripts, self._generated_transcripts])
+
+    def find_manually_created_transcript(self, language_codes):
+        return self._find(language_codes, [self._manually_created_transcripts])
+
+    def find_generated_transcript(self, language_codes):
+        return self._find(language_codes, [self._generated_transcripts])
+
+
+class StubTranscriptApi:
+    def __init__(self, segments_per_video=200, latency=0.0, list_latency=0.0, native=('en', 'hi')):
+        self.segments_per_video = segments_per_video
+        self.latency = latency
+        self.list_latency = list_latency
+        self.native = native
+        self.list_calls = 0
+
+    def list(self, video_id):
+        self.list_calls += 1
+        time.sleep(self.list_latency)
+        manual = {}
+        generated = {}
+        for i, code in enumerate(self.native):
+            transcript = StubTranscript(video_id, code, i > 0, make_segments(self.segments_per_video, code, i),
+                                        self.latency)
+            (generated if transcript.is_generated else manual)[code] = transcript
+        return StubTranscriptList(video_id, manual, generated)
+
+
+class StubAudioStream:
+    def __init__(self, audio_path, latency=0.0):
+        self.audio_path = audio_path
+        self.latency = latency
+
+    def download(self, output_path='.', filename='audio.mp4'):
+        time.sleep(self.latency)
+        target = os.path.join(output_path, filename)
+        shutil.copyfile(self.audio_path, target)
+        return target
+
+
+class StubStreamQuery:
+    def __init__(self, streams):
+        self.streams = streams
+
+    def filter(self, **kwargs):
+        return self
+
+    def first(self):
+        return self.streams[0] if self.streams else None
+
+
+class StubYouTube:
+    length = 600
+    audio_path = None
+    latency = 0.0
+
+    def __init__(self, video_url, client='WEB'):
+        self.video_url = video_url
+        time.sleep(self.latency)
+        self.streams = StubStreamQuery([StubAudioStream(self.audio_path, self.latency)] if self.audio_path else [])
+
+    @classmethod
+    def configure(cls, length=600, audio_path=None, latency=0.0):
+        return type('ConfiguredStubYouTube', (cls,), {'length': length, 'audio_path': audio_path,
+                                                       'latency': latency})
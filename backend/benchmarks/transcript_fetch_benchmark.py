@@ -0,0 +1,44 @@
+import argparse
+import json
+import time
+
+from benchmarks.stubs import StubTranscriptApi
+from utils import transcription
+from utils.transcription import Transcription
+
+
+def run(languages, latency, workers, rounds):
+    timings = []
+    for i in range(rounds):
+        transcription.transcript_list_cache.clear()
+        transcription.transcript_cache.clear()
+        api = StubTranscriptApi(latency=latency)
+        transcriber = Transcription(f'https://www.youtube.com/watch?v=bench{i}', languages,
+                                    transcript_api=api, fetch_workers=workers)
+        start = time.perf_counter()
+        results = transcriber.fetch_all_segments()
+        timings.append(time.perf_counter() - start)
+    return {
+        'workers': workers,
+        'mean_seconds': round(sum(timings) / len(timings), 3),
+        'source_types': {lang: results[lang]['source_type'] for lang in languages},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Sequential vs concurrent transcript fetching against a stub API.')
+    parser.add_argument('--languages', nargs='+', default=['en', 'hi', 'mr'])
+    parser.add_argument('--latency', type=float, default=0.3, help='seconds injected into each fetch/translate')
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+    sequential = run(args.languages, args.latency, 1, args.rounds)
+    concurrent = run(args.languages, args.latency, transcription.FETCH_WORKERS, args.rounds)
+    print(json.dumps({
+        'sequential': sequential,
+        'concurrent': concurrent,
+        'speedup': round(sequential['mean_seconds'] / concurrent['mean_seconds'], 2),
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+
+from models import SummaryCacheEntry, db
+from utils.cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+
+class SummaryCache:
+    def __init__(self, memory_size=512, disk_size=20000, ttl=7 * 24 * 3600):
+        self.memory = LRUCache(max_size=memory_size, ttl=ttl)
+        self.disk_size = disk_size
+        self.ttl = ttl
+        self.disk_hits = 0
+        self.disk_misses = 0
+        self._writes = 0
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.memory.max_size = app.config.get('SUMMARY_CACHE_MEMORY_SIZE', self.memory.max_size)
+        self.disk_size = app.config.get('SUMMARY_CACHE_DISK_SIZE', self.disk_size)
+        self.ttl = app.config.get('SUMMARY_CACHE_TTL', self.ttl)
+        self.memory.ttl = self.ttl
+
+    @staticmethod
+    def make_key(video_id, lang, summary_type, num_sentences, model_version):
+        raw = json.dumps([video_id, lang, summary_type, num_sentences, model_version])
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def get(self, video_id, lang, summary_type, num_sentences, model_version):
+        key = self.make_key(video_id, lang, summary_type, num_sentences, model_version)
+        value = self.memory.get(key)
+        if value is not None:
+            return value
+        try:
+            entry = db.session.get(SummaryCacheEntry, key)
+        except Exception as e:
+            logger.warning(f"Summary cache lookup failed: {e}")
+            return None
+        if entry is None or (self.ttl is not None and entry.created_at + self.ttl < time.time()):
+            with self._lock:
+                self.disk_misses += 1
+            return None
+        with self._lock:
+            self.disk_hits += 1
+        value = json.loads(entry.value)
+        self.memory.set(key, value)
+        return value
+
+    def set(self, video_id, lang, summary_type, num_sentences, model_version, value):
+        key = self.make_key(video_id, lang, summary_type, num_sentences, model_version)
+        self.memory.set(key, value)
+        try:
+            db.session.merge(SummaryCacheEntry(
+                key=key, video_id=video_id, lang=lang, summary_type=summary_type,
+                num_sentences=num_sentences, model_version=model_version,
+                value=json.dumps(value), created_at=time.time()
+            ))
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.warning(f"Summary cache write failed: {e}")
+            return
+        with self._lock:
+            self._writes += 1
+            evict = self._writes % 100 == 0
+        if evict:
+            self.evict()
+
+    def evict(self):
+        try:
+            if self.ttl is not None:
+                SummaryCacheEntry.query.filter(SummaryCacheEntry.created_at < time.time() - self.ttl).delete()
+            overflow = SummaryCacheEntry.query.count() - self.disk_size
+            if overflow > 0:
+                oldest = db.session.query(SummaryCacheEntry.key).order_by(
+                    SummaryCacheEntry.created_at).limit(overflow).all()
+                SummaryCacheEntry.query.filter(SummaryCacheEntry.key.in_([key for key, in oldest])).delete(
+                    synchronize_session=False)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.warning(f"Summary cache eviction failed: {e}")
+
+    def clear(self):
+        self.memory.clear()
+        SummaryCacheEntry.query.delete()
+        db.session.commit()
+
+    def stats(self):
+        memory = self.memory.stats()
+        hits = memory['hits'] + self.disk_hits
+        misses = self.disk_misses
+        total = hits + misses
+        return {
+            'memory': memory,
+            'disk': {'hits': self.disk_hits, 'misses': self.disk_misses, 'max_size': self.disk_size},
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / total, 3) if total else 0.0,
+        }
+
+
+summary_cache = SummaryCache()
@@ -0,0 +1,175 @@
+import atexit
+import datetime
+import logging
+import threading
+
+from sqlalchemy import event, insert
+from sqlalchemy.exc import OperationalError
+
+from __init__ import db
+
+logger = logging.getLogger(__name__)
+
+MAX_FLUSH_ATTEMPTS = 3
+
+
+def _enable_sqlite_wal(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    # WAL lets readers run alongside the single writer, and NORMAL only fsyncs at checkpoints.
+    cursor.execute('PRAGMA journal_mode=WAL')
+    cursor.execute('PRAGMA synchronous=NORMAL')
+    cursor.close()
+
+
+class HistoryWriter:
+    def __init__(self, batch_size=100, flush_interval=1.0, max_pending=10000, enabled=True):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.enabled = enabled
+        self.app = None
+        self.flushed = 0
+        self.flushes = 0
+        self.failures = 0
+        self.dropped = 0
+        self._pending = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def init_app(self, app):
+        self.app = app
+        self.batch_size = app.config.get('HISTORY_BATCH_SIZE', self.batch_size)
+        self.flush_interval = app.config.get('HISTORY_FLUSH_INTERVAL', self.flush_interval)
+        self.enabled = app.config.get('HISTORY_WRITE_BEHIND', self.enabled)
+        with app.app_context():
+            if app.config.get('SQLITE_WAL', True) and db.engine.dialect.name == 'sqlite':
+                event.listen(db.engine, 'connect', _enable_sqlite_wal)
+        if self.enabled and self._thread is None:
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, name='history-writer', daemon=True)
+            self._thread.start()
+            atexit.register(self.shutdown)
+
+    @staticmethod
+    def validate(model, values):
+        # A row the database would reject must not reach the buffer, or it would fail every batch it is in.
+        for column in model.__table__.columns:
+            if column.primary_key or column.name not in values and column.default is not None:
+                continue
+            value = values.get(column.name)
+            if isinstance(value, str) and not value.strip():
+                value = None
+            if value is None:
+                if not column.nullable:
+                    raise ValueError(f"{column.name} is required")
+                continue
+            length = getattr(column.type, 'length', None)
+            if length is not None:
+                if not isinstance(value, str):
+                    raise ValueError(f"{column.name} must be a string")
+                if len(value) > length:
+                    raise ValueError(f"{column.name} must be at most {length} characters")
+
+    def add(self, model, **values):
+        # Stamp rows when they are recorded, not when the batch reaches the database.
+        values.setdefault('created_at', datetime.datetime.utcnow())
+        self.validate(model, values)
+        if not self.enabled:
+            db.session.add(model(**values))
+            db.session.commit()
+            return
+        with self._lock:
+            self._pending.append((model, values, 0))
+            pending = len(self._pending)
+        if pending >= self.max_pending:
+            # The background writer has fallen behind; apply backpressure to the caller.
+            self.flush()
+        elif pending >= self.batch_size:
+            self._wake.set()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self):
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+            if not batch:
+                return 0
+            grouped = {}
+            for model, values, _ in batch:
+                grouped.setdefault(model, []).append(values)
+            with self.app.app_context():
+                try:
+                    for model, rows in grouped.items():
+                        db.session.execute(insert(model), rows)
+                    db.session.commit()
+                    written = len(batch)
+                except Exception as e:
+                    db.session.rollback()
+                    logger.warning(f"History flush of {len(batch)} rows failed, retrying row by row: {e}")
+                    with self._lock:
+                        self.failures += 1
+                    written = self._flush_rows(batch)
+            with self._lock:
+                self.flushed += written
+                self.flushes += 1
+            return written
+
+    def _flush_rows(self, batch):
+        # Isolate the rows that fail so one bad row cannot hold back everybody else's history.
+        written = 0
+        retry = []
+        for model, values, attempts in batch:
+            try:
+                db.session.execute(insert(model), [values])
+                db.session.commit()
+                written += 1
+            except Exception as e:
+                db.session.rollback()
+                # Only a busy or locked database is worth another try; anything else will fail the same way.
+                if isinstance(e, OperationalError) and attempts + 1 < MAX_FLUSH_ATTEMPTS:
+                    retry.append((model, values, attempts + 1))
+                else:
+                    logger.error(f"Dropping {model.__tablename__} history row after {attempts + 1} attempts: {e}")
+                    with self._lock:
+                        self.dropped += 1
+        if retry:
+            with self._lock:
+                if len(self._pending) < self.max_pending:
+                    self._pending[:0] = retry
+                else:
+                    self.dropped += len(retry)
+        return written
+
+    def shutdown(self):
+        if self._thread is None:
+            return
+        self._stopped.set()
+        self._wake.set()
+        self._thread.join(timeout=5)
+        self._thread = None
+        self.flush()
+
+    def stats(self):
+        with self._lock:
+            pending = len(self._pending)
+        return {
+            'enabled': self.enabled,
+            'pending': pending,
+            'flushed': self.flushed,
+            'flushes': self.flushes,
+            'failures': self.failures,
+            'dropped': self.dropped,
+            'batch_size': self.batch_size,
+            'flush_interval': self.flush_interval,
+        }
+
+
+history_writer = HistoryWriter()
@@ -0,0 +1,427 @@
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import uuid
+from concurrent.futures import Future, TimeoutError
+from functools import partial
+from multiprocessing.connection import AuthenticationError, Client, Listener
+
+from utils.model_config import INFERENCE_BACKEND
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INFERENCE_ADDRESS = '127.0.0.1:6001'
+STATS_METHOD = '__stats__'
+REMOTE_METHODS = frozenset({'summarize', 'summarize_batch', 'get_abstractive_summary_within', 'rank_sentences',
+                            'rank_sentences_batch'})
+
+
+class InferenceUnavailable(Exception):
+    pass
+
+
+class InferenceQueueFull(InferenceUnavailable):
+    pass
+
+
+class InferenceTimeout(InferenceUnavailable):
+    pass
+
+
+class InferenceWorkerDied(InferenceUnavailable):
+    pass
+
+
+def _worker_main(current, requests, results, threads, backend):
+    import torch
+    from utils.summarization import TextSummarizer
+    torch.set_num_threads(threads)
+    # The weights were loaded before the fork, so this only wires up references to shared pages.
+    summarizer = TextSummarizer(backend=backend)
+    while True:
+        item = requests.get()
+        if item is None:
+            break
+        request_id, method, args = item
+        # Shared memory is visible to the parent immediately, so a crash mid-call still names the request.
+        current.value = request_id.encode()
+        try:
+            results.put((request_id, True, getattr(summarizer, method)(*args)))
+        except Exception as e:
+            results.put((request_id, False, f"{type(e).__name__}: {e}"))
+        current.value = b''
+
+
+class InferencePool:
+    def __init__(self, workers=2, threads_per_worker=2, queue_size=32, submit_timeout=1.0, call_timeout=300.0,
+                 monitor_interval=1.0, backend=INFERENCE_BACKEND):
+        self.workers = workers
+        self.threads_per_worker = threads_per_worker
+        self.queue_size = queue_size
+        self.submit_timeout = submit_timeout
+        self.call_timeout = call_timeout
+        self.monitor_interval = monitor_interval
+        self.backend = backend
+        self._processes = []
+        self._pending = {}
+        self._current = []
+        self._ctx = None
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        self._requests = None
+        self._results = None
+        self.rejected = 0
+        self.restarts = 0
+
+    @property
+    def started(self):
+        return bool(self._processes)
+
+    def start(self):
+        if self.started:
+            return
+        self._load_models()
+        self._ctx = multiprocessing.get_context('fork')
+        self._requests = self._ctx.Queue(maxsize=self.queue_size)
+        self._results = self._ctx.Queue()
+        self._stopping.clear()
+        self._current = [self._ctx.Array('c', 32, lock=False) for _ in range(self.workers)]
+        self._processes = [self._spawn(i) for i in range(self.workers)]
+        threading.Thread(target=self._dispatch, name='inference-dispatch', daemon=True).start()
+        threading.Thread(target=self._monitor, name='inference-monitor', daemon=True).start()
+        logger.info(f"Started {self.workers} inference workers with {self.threads_per_worker} torch threads each")
+
+    def _load_models(self):
+        from utils.summarization import TextSummarizer
+        # Load in the parent before forking: children share the weight pages copy-on-write, and
+        # safetensors checkpoints are memory-mapped so the page cache is shared as well.
+        TextSummarizer(backend=self.backend)
+
+    def _spawn(self, index):
+        process = self._ctx.Process(target=_worker_main, name=f'inference-{index}', daemon=True,
+                                    args=(self._current[index], self._requests, self._results, self.threads_per_worker,
+                                          self.backend))
+        process.start()
+        return process
+
+    def _dispatch(self):
+        while True:
+            item = self._results.get()
+            if item is None:
+                break
+            request_id, ok, payload = item
+            with self._lock:
+                future = self._pending.pop(request_id, None)
+            if future is None:
+                continue
+            if ok:
+                future.set_result(payload)
+            else:
+                future.set_exception(RuntimeError(payload))
+
+    def _monitor(self):
+        while not self._stopping.wait(self.monitor_interval):
+            for index, process in enumerate(list(self._processes)):
+                if process.is_alive() or self._stopping.is_set():
+                    continue
+                request_id = self._current[index].value.decode()
+                with self._lock:
+                    future = self._pending.pop(request_id, None) if request_id else None
+                    self.restarts += 1
+                logger.error(f"Inference worker {index} exited with code {process.exitcode}; restarting it")
+                if future is not None:
+                    future.set_exception(InferenceWorkerDied(f"Inference worker {index} died during the call"))
+                self._current[index] = self._ctx.Array('c', 32, lock=False)
+                self._processes[index] = self._spawn(index)
+
+    def submit(self, method, *args):
+        request_id = uuid.uuid4().hex
+        future = Future()
+        with self._lock:
+            self._pending[request_id] = future
+        try:
+            self._requests.put((request_id, method, args), timeout=self.submit_timeout)
+        except queue.Full:
+            with self._lock:
+                self._pending.pop(request_id, None)
+                self.rejected += 1
+            raise InferenceQueueFull(f"Inference queue is full ({self.queue_size} pending requests)")
+        return future
+
+    def call(self, method, *args, timeout=None):
+        future = self.submit(method, *args)
+        try:
+            return future.result(timeout=self.call_timeout if timeout is None else timeout)
+        except TimeoutError:
+            with self._lock:
+                for request_id, pending in list(self._pending.items()):
+                    if pending is future:
+                        del self._pending[request_id]
+            raise InferenceTimeout(f"Inference call {method} did not finish in time")
+
+    def shutdown(self):
+        if not self.started:
+            return
+        self._stopping.set()
+        for _ in self._processes:
+            try:
+                self._requests.put_nowait(None)
+            except queue.Full:
+                break
+        for process in self._processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        try:
+            self._results.put_nowait(None)
+        except queue.Full:
+            pass
+        self._processes = []
+
+    def stats(self):
+        with self._lock:
+            pending = len(self._pending)
+        return {
+            'workers': len(self._processes),
+            'threads_per_worker': self.threads_per_worker,
+            'queue_size': self.queue_size,
+            'pending': pending,
+            'rejected': self.rejected,
+            'restarts': self.restarts,
+        }
+
+
+def parse_address(address):
+    # host:port is a TCP address; anything else is a Unix socket path.
+    host, separator, port = address.rpartition(':')
+    if separator and port.isdigit():
+        return host or '127.0.0.1', int(port)
+    return address
+
+
+class InferenceServer:
+    # Runs the worker pool in its own process (see run_inference.py), so the models are loaded once per
+    # machine rather than once per web worker. Web workers talk to it through InferenceClient.
+    def __init__(self, pool, address=DEFAULT_INFERENCE_ADDRESS, authkey=b'', methods=REMOTE_METHODS):
+        self.pool = pool
+        self.address = address
+        self.authkey = authkey
+        self.methods = methods
+        self._listener = None
+        self._stopping = threading.Event()
+        self.ready = threading.Event()
+
+    def serve_forever(self):
+        # Fork the workers before this process has any other threads.
+        self.pool.start()
+        self._listener = Listener(parse_address(self.address), authkey=self.authkey)
+        logger.info(f"Inference server listening on {self.address}")
+        self.ready.set()
+        try:
+            while True:
+                try:
+                    connection = self._listener.accept()
+                except AuthenticationError as e:
+                    logger.warning(f"Rejected inference client: {e}")
+                    continue
+                except OSError:
+                    break
+                if self._stopping.is_set():
+                    connection.close()
+                    break
+                threading.Thread(target=self._handle, args=(connection,), name='inference-connection',
+                                 daemon=True).start()
+        finally:
+            self._listener.close()
+            self.pool.shutdown()
+
+    def shutdown(self):
+        if self._listener is None or self._stopping.is_set():
+            return
+        self._stopping.set()
+        # Closing the listener does not wake a blocked accept(), so connect once to let the loop exit.
+        try:
+            Client(parse_address(self.address), authkey=self.authkey).close()
+        except (OSError, AuthenticationError):
+            pass
+
+    def _handle(self, connection):
+        send_lock = threading.Lock()
+
+        def reply(message):
+            with send_lock:
+                try:
+                    connection.send(message)
+                except (OSError, ValueError):
+                    pass
+
+        try:
+            while True:
+                request_id, method, args = connection.recv()
+                if method == STATS_METHOD:
+                    reply((request_id, True, self.pool.stats()))
+                    continue
+                if method not in self.methods:
+                    reply((request_id, False, ('RuntimeError', f"Unknown inference method {method!r}")))
+                    continue
+                try:
+                    future = self.pool.submit(method, *args)
+                except InferenceUnavailable as e:
+                    reply((request_id, False, (type(e).__name__, str(e))))
+                    continue
+                future.add_done_callback(partial(self._reply_result, reply, request_id))
+        except (EOFError, OSError):
+            pass
+        finally:
+            connection.close()
+
+    @staticmethod
+    def _reply_result(reply, request_id, future):
+        error = future.exception()
+        if error is None:
+            reply((request_id, True, future.result()))
+        else:
+            reply((request_id, False, (type(error).__name__, str(error))))
+
+
+REMOTE_ERRORS = {error.__name__: error for error in
+                 (InferenceUnavailable, InferenceQueueFull, InferenceTimeout, InferenceWorkerDied)}
+
+
+class InferenceClient:
+    def __init__(self, address=None, authkey=b'', call_timeout=300.0):
+        self.address = address
+        self.authkey = authkey
+        self.call_timeout = call_timeout
+        self.rejected = 0
+        self.timeouts = 0
+        self.disconnects = 0
+        self._reset()
+        # Each process needs its own connection and reader thread: a child forked by gunicorn --preload
+        # must not share the parent's socket or wait on futures that only the parent's reader resolves.
+        os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        self._lock = threading.Lock()
+        self._send_lock = threading.Lock()
+        self._connection = None
+        self._pending = {}
+
+    def init_app(self, app):
+        self.address = app.config.get('INFERENCE_ADDRESS', self.address)
+        self.authkey = app.config.get('INFERENCE_AUTHKEY', self.authkey)
+        self.call_timeout = app.config.get('INFERENCE_TIMEOUT', self.call_timeout)
+
+    @property
+    def enabled(self):
+        return bool(self.address)
+
+    def _connect(self):
+        try:
+            connection = Client(parse_address(self.address), authkey=self.authkey)
+        except (OSError, AuthenticationError) as e:
+            raise InferenceUnavailable(f"Inference server at {self.address} is unavailable: {e}")
+        threading.Thread(target=self._read, args=(connection,), name='inference-client', daemon=True).start()
+        return connection
+
+    def _read(self, connection):
+        try:
+            while True:
+                request_id, ok, payload = connection.recv()
+                with self._lock:
+                    future = self._pending.pop(request_id, None)
+                    if not ok and payload[0] == InferenceQueueFull.__name__:
+                        self.rejected += 1
+                if future is None:
+                    continue
+                if ok:
+                    future.set_result(payload)
+                else:
+                    kind, message = payload
+                    future.set_exception(REMOTE_ERRORS.get(kind, RuntimeError)(message))
+        except (EOFError, OSError):
+            pass
+        with self._lock:
+            if self._connection is not connection:
+                return
+            self._connection = None
+            pending, self._pending = self._pending, {}
+            self.disconnects += 1
+        connection.close()
+        logger.error(f"Lost connection to inference server at {self.address}")
+        for future in pending.values():
+            future.set_exception(InferenceWorkerDied("Lost connection to the inference server during the call"))
+
+    def call(self, method, *args, timeout=None):
+        request_id = uuid.uuid4().hex
+        future = Future()
+        with self._lock:
+            if self._connection is None:
+                self._connection = self._connect()
+            connection = self._connection
+            self._pending[request_id] = future
+        try:
+            with self._send_lock:
+                connection.send((request_id, method, args))
+        except (OSError, ValueError) as e:
+            with self._lock:
+                self._pending.pop(request_id, None)
+            raise InferenceUnavailable(f"Could not reach the inference server: {e}")
+        try:
+            return future.result(timeout=self.call_timeout if timeout is None else timeout)
+        except TimeoutError:
+            with self._lock:
+                self._pending.pop(request_id, None)
+                self.timeouts += 1
+            raise InferenceTimeout(f"Inference call {method} did not finish in time")
+
+    def stats(self):
+        stats = {
+            'enabled': self.enabled,
+            'address': self.address,
+            'rejected': self.rejected,
+            'timeouts': self.timeouts,
+            'disconnects': self.disconnects,
+            'server': None,
+        }
+        if self.enabled:
+            try:
+                stats['server'] = self.call(STATS_METHOD, timeout=2)
+            except InferenceUnavailable:
+                pass
+        with self._lock:
+            stats['pending'] = len(self._pending)
+            stats['connected'] = self._connection is not None
+        return stats
+
+
+class RemoteSummarizer:
+    def __init__(self, client):
+        self.client = client
+
+    def summarize(self, text, summary_type='extractive', num_sentences=2):
+        return self.client.call('summarize', text, summary_type, num_sentences)
+
+    def summarize_batch(self, texts, summary_type='extractive', num_sentences=2):
+        return self.client.call('summarize_batch', texts, summary_type, num_sentences)
+
+    def get_abstractive_summary_within(self, text, deadline=None):
+        return self.client.call('get_abstractive_summary_within', text, deadline)
+
+    def rank_sentences(self, text):
+        return self.client.call('rank_sentences', text)
+
+    def rank_sentences_batch(self, texts):
+        return self.client.call('rank_sentences_batch', texts)
+
+
+inference_client = InferenceClient()
+
+
+def get_summarizer():
+    if inference_client.enabled:
+        return RemoteSummarizer(inference_client)
+    from utils.summarization import get_summarizer as get_local_summarizer
+    return get_local_summarizer()
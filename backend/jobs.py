@@ -0,0 +1,149 @@
+import copy
+import json
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from admission import AdmissionRejected
+from pipeline import VideoTooLong, iter_summary
+from utils.cache import LRUCache
+from utils.youtube import extract_video_id
+
+logger = logging.getLogger(__name__)
+
+
+class Job:
+    def __init__(self, key, languages, video_url, num_sentences, client=None):
+        self.id = uuid.uuid4().hex
+        self.client = client
+        self.key = key
+        self.languages = languages
+        self.video_url = video_url
+        self.num_sentences = num_sentences
+        self.status = 'queued'
+        self.stages = []
+        self.partial = {}
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        # The job thread records stages while GET /jobs/<id> serializes them.
+        self._lock = threading.Lock()
+
+    def record(self, event):
+        with self._lock:
+            self.stages.append({'stage': event['stage'], 'lang': event['lang'], 'seconds': event['seconds']})
+            if event['lang'] is None:
+                return
+            if event['stage'] == 'cached':
+                self.partial[event['lang']] = {'extractive': event['data']['extractive'],
+                                               'abstractive': event['data']['abstractive']}
+            elif event['stage'] in ('extractive', 'abstractive'):
+                self.partial.setdefault(event['lang'], {})[event['stage']] = event['data']
+
+    def finish(self, result):
+        with self._lock:
+            self.result = result
+
+    def to_dict(self):
+        with self._lock:
+            stages = list(self.stages)
+            partial = copy.deepcopy(self.partial) if self.result is None else None
+        return {
+            'job_id': self.id,
+            'status': self.status,
+            'video_url': self.video_url,
+            'languages': self.languages,
+            'num_sentences': self.num_sentences,
+            'stages': stages,
+            'partial': partial,
+            'result': self.result,
+            'error': self.error,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+        }
+
+
+class JobManager:
+    def __init__(self, max_workers=2, retention=3600):
+        self.max_workers = max_workers
+        self.retention = retention
+        self._executor = None
+        self._jobs = LRUCache(max_size=1000, ttl=retention)
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.max_workers = app.config.get('JOB_WORKERS', self.max_workers)
+        self.retention = app.config.get('JOB_RETENTION', self.retention)
+        self._jobs.ttl = self.retention
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='summary-job')
+        return self._executor
+
+    @staticmethod
+    def make_key(languages, video_url, num_sentences):
+        # Different links to the same video, or the same languages in another order, share one job.
+        try:
+            video = extract_video_id(video_url)
+        except Exception:
+            video = video_url
+        return json.dumps([video, sorted(languages), num_sentences])
+
+    def submit(self, app, languages, video_url, num_sentences, client=None):
+        key = self.make_key(languages, video_url, num_sentences)
+        with self._lock:
+            job = self._inflight.get(key)
+            if job is not None:
+                return job
+            job = Job(key, languages, video_url, num_sentences, client)
+            self._inflight[key] = job
+            self._jobs.set(job.id, job)
+        self.executor.submit(self._run, app, job)
+        return job
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    def _run(self, app, job):
+        job.status = 'running'
+        job.started_at = time.time()
+        try:
+            with app.app_context():
+                for event in iter_summary(job.languages, job.video_url, job.num_sentences, client=job.client):
+                    if event['stage'] == 'done':
+                        job.finish(event['data'])
+                    else:
+                        job.record(event)
+            job.status = 'done'
+        except VideoTooLong:
+            job.status = 'failed'
+            job.error = 'Video too long'
+        except AdmissionRejected as e:
+            job.status = 'failed'
+            job.error = str(e)
+        except Exception as e:
+            logger.exception(f"Summary job {job.id} failed")
+            job.status = 'failed'
+            job.error = str(e)
+        finally:
+            job.finished_at = time.time()
+            with self._lock:
+                self._inflight.pop(job.key, None)
+            # Refresh the retention window from completion rather than submission.
+            self._jobs.set(job.id, job)
+
+    def stats(self):
+        with self._lock:
+            inflight = len(self._inflight)
+        return {'inflight': inflight, 'retained': len(self._jobs), 'max_workers': self.max_workers}
+
+
+job_manager = JobManager()
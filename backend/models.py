@@ -1,4 +1,12 @@
+import datetime
+
+from sqlalchemy import inspect, text
+
 from __init__ import db, bcrypt
+from history import history_writer
+
+RECENT_HISTORY_LIMIT = 10
+MAX_HISTORY_PAGE_SIZE = 100
 
 
 class User(db.Model):
@@ -34,32 +42,112 @@ class User(db.Model):
         return bcrypt.check_password_hash(self.password_hash, password)
 
     def add_search(self, query):
-        search = SearchHistory(user_id=self.id, query=query)
-        db.session.add(search)
-        db.session.commit()
+        history_writer.add(SearchHistory, user_id=self.id, query=query)
 
     def get_search_history(self):
+        history_writer.flush()
         return [search.query for search in self.searches]
 
+    def get_search_page(self, cursor=None, limit=RECENT_HISTORY_LIMIT):
+        return _history_page(SearchHistory, self.id, cursor, limit)
+
+    def get_search_count(self):
+        history_writer.flush()
+        return db.session.query(SearchHistory).filter_by(user_id=self.id).count()
+
     def add_download(self, item):
-        download = DownloadHistory(user_id=self.id, item=item)
-        db.session.add(download)
-        db.session.commit()
+        history_writer.add(DownloadHistory, user_id=self.id, item=item)
 
     def get_download_history(self):
+        history_writer.flush()
         return [download.item for download in self.downloads]
 
+    def get_download_page(self, cursor=None, limit=RECENT_HISTORY_LIMIT):
+        return _history_page(DownloadHistory, self.id, cursor, limit)
+
+    def get_download_count(self):
+        history_writer.flush()
+        return db.session.query(DownloadHistory).filter_by(user_id=self.id).count()
+
+    def get_profile(self):
+        return {
+            "username": self.get_username(),
+            "email": self.email,
+            "search_history": [entry['value'] for entry in self.get_search_page()[0]],
+            "download_history": [entry['value'] for entry in self.get_download_page()[0]],
+            "search_count": self.get_search_count(),
+            "download_count": self.get_download_count(),
+        }
+
     def __repr__(self):
         return f'<User {self.username}>'
 
 
 class SearchHistory(db.Model):
+    __table_args__ = (db.Index('ix_search_history_user_id_id', 'user_id', 'id'),)
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     query = db.Column(db.String(255), nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.datetime.utcnow)
+
+    @property
+    def value(self):
+        return self.query
 
 
 class DownloadHistory(db.Model):
+    __table_args__ = (db.Index('ix_download_history_user_id_id', 'user_id', 'id'),)
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     item = db.Column(db.String(255), nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.datetime.utcnow)
+
+    @property
+    def value(self):
+        return self.item
+
+
+def _history_page(model, user_id, cursor=None, limit=RECENT_HISTORY_LIMIT):
+    # Keyset pagination on (user_id, id): newest first, and each page is an index range scan.
+    # SearchHistory has a column named `query`, so go through the session rather than Model.query.
+    # Read-your-writes: anything still buffered by the write-behind writer goes in first.
+    history_writer.flush()
+    limit = max(1, min(int(limit), MAX_HISTORY_PAGE_SIZE))
+    query = db.session.query(model).filter(model.user_id == user_id)
+    if cursor is not None:
+        query = query.filter(model.id < int(cursor))
+    rows = query.order_by(model.id.desc()).limit(limit + 1).all()
+    items = [
+        {"id": row.id, "value": row.value, "created_at": row.created_at.isoformat() if row.created_at else None}
+        for row in rows[:limit]
+    ]
+    next_cursor = rows[limit - 1].id if len(rows) > limit else None
+    return items, next_cursor
+
+
+def ensure_history_schema():
+    # create_all() does not alter existing tables, so databases created before history timestamps
+    # and indexes existed are upgraded in place.
+    inspector = inspect(db.engine)
+    for model in (SearchHistory, DownloadHistory):
+        table = model.__tablename__
+        columns = {column['name'] for column in inspector.get_columns(table)}
+        if 'created_at' not in columns:
+            db.session.execute(text(f'ALTER TABLE {table} ADD COLUMN created_at DATETIME'))
+            db.session.execute(text(f'UPDATE {table} SET created_at = CURRENT_TIMESTAMP WHERE created_at IS NULL'))
+    db.session.commit()
+    for model in (SearchHistory, DownloadHistory):
+        for index in model.__table__.indexes:
+            index.create(bind=db.engine, checkfirst=True)
+
+
+class SummaryCacheEntry(db.Model):
+    __tablename__ = 'summary_cache'
+    key = db.Column(db.String(64), primary_key=True)
+    video_id = db.Column(db.String(32), nullable=False, index=True)
+    lang = db.Column(db.String(16), nullable=False)
+    summary_type = db.Column(db.String(32), nullable=False)
+    num_sentences = db.Column(db.Integer)
+    model_version = db.Column(db.String(128), nullable=False)
+    value = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.Float, nullable=False, index=True)
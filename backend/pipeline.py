@@ -0,0 +1,277 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from admission import AdmissionRejected, admission_controller, estimate_cost
+from caching import summary_cache
+from inference import get_summarizer
+from utils.metrics import metrics, observe_stage
+from utils.model_config import MODEL_VERSION
+from utils.ranking import select_ranked_sentences
+from utils.youtube import extract_video_id, video_length_cache
+
+logger = logging.getLogger(__name__)
+
+MAX_VIDEO_LENGTH = 7600
+SPOKEN_WORDS_PER_SECOND = 2.5
+BATCH_FETCH_WORKERS = 4
+BATCH_MAX_TEXTS = 8
+MAX_BATCH_VIDEOS = 20
+
+
+decoding_total = metrics.counter('abstractive_decoding_total',
+                                 'Abstractive summaries by decoding strategy and whether the deadline cut them short.')
+
+
+class VideoTooLong(Exception):
+    pass
+
+
+def get_cached_parts(video_id, lang):
+    return {kind: summary_cache.get(video_id, lang, kind, None, MODEL_VERSION)
+            for kind in ('transcript', 'ranking', 'abstractive')}
+
+
+def entry_from_parts(video_id, lang, parts, num_sentences):
+    if parts['transcript'] is None or parts['abstractive'] is None:
+        return None
+    if parts['ranking'] is not None:
+        # Any num_sentences is a slice of the stored ranking, so no model runs here.
+        extractive = select_ranked_sentences(parts['ranking'], num_sentences)
+    else:
+        # Entries written before rankings were stored only have per-num_sentences extractive text.
+        extractive = summary_cache.get(video_id, lang, 'extractive', num_sentences, MODEL_VERSION)
+        if extractive is None:
+            return None
+    return {'transcript': parts['transcript'], 'extractive': extractive, 'abstractive': parts['abstractive'],
+            'decoding': {'strategy': 'cached', 'seconds': 0.0}}
+
+
+def get_cached_entry(video_id, lang, num_sentences):
+    return entry_from_parts(video_id, lang, get_cached_parts(video_id, lang), num_sentences)
+
+
+def set_cached_entry(video_id, lang, lang_entry, ranking, cache_abstractive=True):
+    summary_cache.set(video_id, lang, 'transcript', None, MODEL_VERSION, lang_entry['transcript'])
+    summary_cache.set(video_id, lang, 'ranking', None, MODEL_VERSION, ranking)
+    if cache_abstractive:
+        summary_cache.set(video_id, lang, 'abstractive', None, MODEL_VERSION, lang_entry['abstractive'])
+
+
+def estimate_length(transcripts):
+    # Without metadata, infer the video length from how much was said.
+    words = max(len(data['text'].split()) for data in transcripts) if transcripts else 0
+    return words / SPOKEN_WORDS_PER_SECOND
+
+
+def _event(stage, started, lang=None, data=None):
+    seconds = time.perf_counter() - started
+    observe_stage(stage, seconds)
+    return {'stage': stage, 'lang': lang, 'seconds': round(seconds, 3), 'data': data}
+
+
+# Yields one event per finished stage; the final 'done' event carries the full result. With a budget_ms,
+# abstractive decoding is sized to whatever is left of the budget once transcripts and rankings are done.
+def iter_summary(languages, video_url, num_sentences, budget_ms=None, client=None):
+    started = time.perf_counter()
+    deadline = None if budget_ms is None else time.time() + budget_ms / 1000
+    video_id = extract_video_id(video_url)
+    summaries = {}
+    cached_parts = {}
+    for lang in languages:
+        parts = get_cached_parts(video_id, lang)
+        lang_entry = entry_from_parts(video_id, lang, parts, num_sentences)
+        if lang_entry is not None:
+            summaries[lang] = lang_entry
+            yield {'stage': 'cached', 'lang': lang, 'seconds': round(time.perf_counter() - started, 3),
+                   'data': lang_entry}
+        else:
+            cached_parts[lang] = parts
+    observe_stage('cache_lookup', time.perf_counter() - started)
+    missing = [lang for lang in languages if lang not in summaries]
+    # Languages whose transcript is cached only need the artifacts that are missing, not a new fetch.
+    to_fetch = [lang for lang in missing if cached_parts[lang]['transcript'] is None]
+    transcripts = {lang: {'text': cached_parts[lang]['transcript'], 'source_type': 'cached'}
+                   for lang in missing if lang not in to_fetch}
+    if to_fetch:
+        from utils.transcription import Transcription
+        started = time.perf_counter()
+        transcription = Transcription(video_url, to_fetch)
+        length = transcription.get_video_length()
+        yield _event('metadata', started, data={'length': length})
+        if length > MAX_VIDEO_LENGTH:
+            raise VideoTooLong(length)
+    elif missing:
+        length = video_length_cache.get(video_id) or estimate_length(transcripts.values())
+    if missing:
+        started = time.perf_counter()
+        # The summary pipeline has no ASR fallback; languages without captions come back empty.
+        cost = estimate_cost(length, len(missing), asr=False)
+        with admission_controller.admit(cost, client or 'anonymous'):
+            observe_stage('admission', time.perf_counter() - started)
+            if to_fetch:
+                started = time.perf_counter()
+                transcripts.update(transcription.get_transcripts())
+                preprocess_seconds = transcription.timings['preprocess']
+                fetch_seconds = time.perf_counter() - started - preprocess_seconds
+                observe_stage('transcript', fetch_seconds)
+                observe_stage('preprocess', preprocess_seconds)
+                yield {'stage': 'preprocess', 'lang': None, 'seconds': round(preprocess_seconds, 3),
+                       'data': None}
+                for lang in to_fetch:
+                    transcript_data = transcripts.get(lang, {'text': '', 'source_type': 'not_available'})
+                    yield {'stage': 'transcript', 'lang': lang, 'seconds': round(fetch_seconds, 3),
+                           'data': transcript_data}
+            pending = []
+            for lang in missing:
+                transcript_data = transcripts.get(lang, {'text': '', 'source_type': 'not_available'})
+                lang_entry = {'transcript': '', 'extractive': '', 'abstractive': ''}
+                summaries[lang] = lang_entry
+                if transcript_data['source_type'] not in ('not_available', 'error'):
+                    lang_entry['transcript'] = transcript_data['text']
+                    pending.append(lang)
+            summarizer = get_summarizer() if pending else None
+            rankings = {}
+            # Extractive summaries are cheap, so every language gets one before any mT5 beam search starts.
+            for lang in pending:
+                started = time.perf_counter()
+                rankings[lang] = cached_parts[lang]['ranking'] or \
+                    summarizer.rank_sentences(summaries[lang]['transcript'])
+                summaries[lang]['extractive'] = select_ranked_sentences(rankings[lang], num_sentences)
+                yield _event('extractive', started, lang, summaries[lang]['extractive'])
+            for position, lang in enumerate(pending):
+                started = time.perf_counter()
+                lang_entry = summaries[lang]
+                if cached_parts[lang]['abstractive']:
+                    lang_entry['abstractive'] = cached_parts[lang]['abstractive']
+                    lang_entry['decoding'] = {'strategy': 'cached', 'seconds': 0.0}
+                else:
+                    # Languages still waiting share the remaining budget evenly.
+                    lang_deadline = None
+                    if deadline is not None:
+                        lang_deadline = time.time() + (deadline - time.time()) / (len(pending) - position)
+                    result = summarizer.get_abstractive_summary_within(lang_entry['transcript'], lang_deadline)
+                    lang_entry['abstractive'] = result['summary']
+                    lang_entry['decoding'] = result['decoding']
+                    decoding_total.inc(strategy=result['decoding']['strategy'],
+                                       stopped=str(result['decoding']['stopped_at_deadline']).lower())
+                yield _event('abstractive', started, lang, lang_entry['abstractive'])
+                # Budget-reduced summaries are served but not cached, so later requests can get the full one.
+                set_cached_entry(video_id, lang, lang_entry, rankings[lang],
+                                 cache_abstractive=not lang_entry['decoding'].get('degraded', False))
+    yield {'stage': 'done', 'lang': None, 'seconds': 0.0, 'data': {lang: summaries[lang] for lang in languages}}
+
+
+def run_summary(languages, video_url, num_sentences, budget_ms=None, client=None):
+    result = None
+    for event in iter_summary(languages, video_url, num_sentences, budget_ms, client):
+        if event['stage'] == 'done':
+            result = event['data']
+    return result
+
+
+def _fetch_video(video_url, languages):
+    from utils.transcription import Transcription
+    transcription = Transcription(video_url, languages)
+    length = transcription.get_video_length()
+    if length > MAX_VIDEO_LENGTH:
+        raise VideoTooLong(length)
+    return length, transcription.get_transcripts()
+
+
+def _video_event(video_url, started, data=None, error=None):
+    return {'video_url': video_url, 'status': 'error' if error else 'done',
+            'seconds': round(time.perf_counter() - started, 3), 'data': data, 'error': error}
+
+
+def _summarize_group(urls, states, languages, num_sentences, started, client):
+    items = [(url, lang) for url in urls for lang in states[url]['pending']]
+    texts = [states[url]['summaries'][lang]['transcript'] for url, lang in items]
+    if texts:
+        cost = sum(estimate_cost(states[url]['length'], len(states[url]['pending'])) for url in urls)
+        try:
+            with admission_controller.admit(cost, client or 'anonymous'):
+                _summarize_texts(items, texts, states, num_sentences)
+        except AdmissionRejected as e:
+            for url in urls:
+                yield _video_event(url, started, error=str(e))
+            return
+    for url in urls:
+        summaries = states[url]['summaries']
+        yield _video_event(url, started, data={lang: summaries[lang] for lang in languages})
+
+
+def _summarize_texts(items, texts, states, num_sentences):
+    summarizer = get_summarizer()
+    stage_started = time.perf_counter()
+    rankings = summarizer.rank_sentences_batch(texts)
+    extractive = [select_ranked_sentences(ranking, num_sentences) for ranking in rankings]
+    observe_stage('extractive', time.perf_counter() - stage_started)
+    stage_started = time.perf_counter()
+    abstractive = summarizer.summarize_batch(texts, summary_type='abstractive')
+    observe_stage('abstractive', time.perf_counter() - stage_started)
+    for (url, lang), ranking, extractive_summary, abstractive_summary in zip(items, rankings, extractive,
+                                                                            abstractive):
+        lang_entry = states[url]['summaries'][lang]
+        lang_entry['extractive'] = extractive_summary
+        lang_entry['abstractive'] = abstractive_summary
+        set_cached_entry(states[url]['video_id'], lang, lang_entry, ranking)
+
+
+# Yields one event per video as soon as it is summarized. Transcripts are fetched concurrently and the
+# texts of every video that is ready go through shared extractive and abstractive batches.
+def iter_batch_summary(video_urls, languages, num_sentences, fetch_workers=BATCH_FETCH_WORKERS,
+                       max_batch_texts=BATCH_MAX_TEXTS, client=None):
+    started = time.perf_counter()
+    states = {}
+    for video_url in dict.fromkeys(video_urls):
+        try:
+            video_id = extract_video_id(video_url)
+        except Exception:
+            yield _video_event(video_url, started, error='Invalid video URL')
+            continue
+        summaries = {}
+        for lang in languages:
+            lang_entry = get_cached_entry(video_id, lang, num_sentences)
+            if lang_entry is not None:
+                summaries[lang] = lang_entry
+        missing = [lang for lang in languages if lang not in summaries]
+        if not missing:
+            yield _video_event(video_url, started, data=summaries)
+        else:
+            states[video_url] = {'video_id': video_id, 'summaries': summaries, 'missing': missing, 'pending': [],
+                                 'length': None}
+    if not states:
+        return
+    executor = ThreadPoolExecutor(max_workers=min(fetch_workers, len(states)))
+    try:
+        futures = {executor.submit(_fetch_video, url, state['missing']): url for url, state in states.items()}
+        ready = []
+        remaining = len(futures)
+        for future in as_completed(futures):
+            remaining -= 1
+            url = futures[future]
+            state = states[url]
+            try:
+                state['length'], transcripts = future.result()
+            except VideoTooLong:
+                yield _video_event(url, started, error='Video too long')
+                transcripts = None
+            except Exception as e:
+                yield _video_event(url, started, error=str(e))
+                transcripts = None
+            if transcripts is not None:
+                for lang in state['missing']:
+                    transcript_data = transcripts.get(lang, {'text': '', 'source_type': 'not_available'})
+                    lang_entry = {'transcript': '', 'extractive': '', 'abstractive': ''}
+                    state['summaries'][lang] = lang_entry
+                    if transcript_data['source_type'] not in ('not_available', 'error'):
+                        lang_entry['transcript'] = transcript_data['text']
+                        state['pending'].append(lang)
+                ready.append(url)
+            batch_texts = sum(len(states[u]['pending']) for u in ready)
+            if ready and (remaining == 0 or batch_texts >= max_batch_texts):
+                yield from _summarize_group(ready, states, languages, num_sentences, started, client)
+                ready = []
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
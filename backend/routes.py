@@ -1,24 +1,107 @@
 import datetime
+import json
 import logging
+import sys
 from functools import wraps
 
 import jwt
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, current_app, g, request, jsonify, stream_with_context
 from flask_mail import Message
-from pytubefix import YouTube
 
 from __init__ import mail
-from assistant import assistant_response
+from admission import AdmissionRejected, admission_controller
+from assistant import assistant_response, faq_stats, response_cache
+from caching import summary_cache
+from history import history_writer
+from inference import InferenceUnavailable, inference_client
+from jobs import job_manager
 from models import User, db
-from utils.summarization import TextSummarizer
-from utils.transcription import Transcription
+from pipeline import MAX_BATCH_VIDEOS, VideoTooLong, iter_batch_summary, iter_summary, run_summary
+from utils.metrics import metrics, server_timing_header
+from utils.model_registry import registry
 
 routes = Blueprint('routes', __name__)
 SECRET_KEY = "your_secret_key"
 YOUR_EMAIL_TO_SEND_FEEDBACK_TO = ''
-logging.basicConfig(level=logging.DEBUG)
+logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+
+def collect_model_metrics():
+    stats = registry.stats()['models']
+    return [
+        ('model_load_seconds', 'gauge', 'Time taken to load each model.',
+         [({'model': name}, stat['load_seconds']) for name, stat in stats.items()]),
+        ('model_size_megabytes', 'gauge', 'Parameter and buffer size of each loaded model.',
+         [({'model': name}, stat['size_mb']) for name, stat in stats.items()]),
+    ]
+
+
+def collect_cache_metrics():
+    caches = {'summary': summary_cache.stats(), 'assistant_response': response_cache.stats()}
+    # Only report transcript caches once something has imported the (heavy) transcription module.
+    transcription_module = sys.modules.get('utils.transcription')
+    if transcription_module is not None:
+        caches['transcript_list'] = transcription_module.transcript_list_cache.stats()
+        caches['transcript'] = transcription_module.transcript_cache.stats()
+        caches['video_length'] = transcription_module.video_length_cache.stats()
+    summarization_module = sys.modules.get('utils.summarization')
+    if summarization_module is not None:
+        caches['sentence_embedding'] = summarization_module.embedding_cache.stats()
+    return [
+        ('cache_hits_total', 'counter', 'Cache hits per cache.',
+         [({'cache': name}, stat['hits']) for name, stat in caches.items()]),
+        ('cache_misses_total', 'counter', 'Cache misses per cache.',
+         [({'cache': name}, stat['misses']) for name, stat in caches.items()]),
+        ('cache_hit_ratio', 'gauge', 'Hit ratio per cache.',
+         [({'cache': name}, stat['hit_rate']) for name, stat in caches.items()]),
+        ('cache_memory_bytes', 'gauge', 'Bytes held by array-backed caches.',
+         [({'cache': name}, stat['memory_bytes']) for name, stat in caches.items() if 'memory_bytes' in stat]),
+        ('assistant_faq_answers_total', 'counter', 'Assistant questions answered from the local FAQ index.',
+         [({'result': result}, count) for result, count in faq_stats.items()]),
+    ]
+
+
+def collect_history_metrics():
+    stats = history_writer.stats()
+    return [
+        ('history_pending_rows', 'gauge', 'History rows buffered by the write-behind writer.',
+         [({}, stats['pending'])]),
+        ('history_flushed_rows_total', 'counter', 'History rows written to the database.',
+         [({}, stats['flushed'])]),
+        ('history_flushes_total', 'counter', 'Batched history transactions committed.',
+         [({}, stats['flushes'])]),
+        ('history_flush_failures_total', 'counter', 'History flushes that failed and were retried.',
+         [({}, stats['failures'])]),
+        ('history_dropped_rows_total', 'counter', 'History rows dropped after failing on their own.',
+         [({}, stats['dropped'])]),
+    ]
+
+
+def collect_admission_metrics():
+    stats = admission_controller.stats()
+    return [
+        ('admission_cost_in_use', 'gauge', 'Estimated transcript-minutes of summary work currently admitted.',
+         [({}, stats['in_use'])]),
+        ('admission_cost_budget', 'gauge', 'Global admission budget in transcript-minutes.',
+         [({}, stats['global_budget'])]),
+        ('admission_waiting', 'gauge', 'Summary requests queued for admission.', [({}, stats['waiting'])]),
+    ]
+
+
+metrics.register_collector(collect_model_metrics)
+metrics.register_collector(collect_cache_metrics)
+metrics.register_collector(collect_history_metrics)
+metrics.register_collector(collect_admission_metrics)
+
+
+@routes.after_app_request
+def add_server_timing(response):
+    timings = g.get('stage_timings')
+    if timings and current_app.config.get('SERVER_TIMING'):
+        response.headers['Server-Timing'] = server_timing_header(timings)
+    return response
+
 def send_email(to, subject, message_body):
     msg = Message(subject, recipients=[to])
     msg.body = message_body
@@ -26,6 +109,18 @@ def send_email(to, subject, message_body):
     return "Email sent successfully!"
 
 
+def client_key():
+    # Summary endpoints don't require a login, so budgets fall back to the caller's address.
+    auth_header = request.headers.get("Authorization")
+    if auth_header and auth_header.startswith("Bearer "):
+        try:
+            decoded_data = jwt.decode(auth_header.split(" ")[1], SECRET_KEY, algorithms=["HS256"])
+            return f"user:{decoded_data['user_id']}"
+        except (jwt.InvalidTokenError, KeyError):
+            pass
+    return f"ip:{request.remote_addr}"
+
+
 def token_required(f):
     @wraps(f)
     def decorated(*args, **kwargs):
@@ -88,6 +183,7 @@ def assistant():
 
 @routes.route('/list_transcripts', methods=['GET'])
 def list_transcripts():
+    from utils.transcription import Transcription
     video_url = request.get_json().get('video_url')
     transcription = Transcription(video_url, ['en', 'hi', 'mr'])
     dct = transcription.list_transcript_languages()
@@ -111,8 +207,7 @@ def update_profile(f):
         password = request.get_json().get('new_password')
         user.change_password(old_password, password)
     user.change_username(username)
-    return jsonify({"username": user.get_username(), "email": user.email, "search_history": user.get_search_history(),
-                    "download_history": user.get_download_history()})
+    return jsonify(user.get_profile())
 
 
 @routes.route('/profile', methods=['POST'])
@@ -120,8 +215,38 @@ def update_profile(f):
 def get_profile(f):
     username = request.get_json().get('username')
     user = User.query.filter_by(username=username).first()
-    return jsonify({"username": user.get_username(), "email": user.email, "search_history": user.get_search_history(),
-                    "download_history": user.get_download_history()})
+    return jsonify(user.get_profile())
+
+
+def history_page(f, kind):
+    user = User.query.filter_by(id=f['user_id']).first()
+    if not user:
+        return jsonify({"error": "User not found"}), 404
+    # request.args.get(type=int) falls back to the default on a bad value, so parse the raw strings.
+    cursor = request.args.get('cursor')
+    limit = request.args.get('limit')
+    try:
+        cursor = int(cursor) if cursor is not None else None
+        limit = int(limit) if limit is not None else 20
+    except ValueError:
+        return jsonify({"error": "Invalid pagination parameters"}), 400
+    if kind == 'search':
+        items, next_cursor = user.get_search_page(cursor, limit)
+    else:
+        items, next_cursor = user.get_download_page(cursor, limit)
+    return jsonify({"items": items, "next_cursor": next_cursor})
+
+
+@routes.route('/history/search', methods=['GET'])
+@token_required
+def search_history(f):
+    return history_page(f, 'search')
+
+
+@routes.route('/history/download', methods=['GET'])
+@token_required
+def download_history(f):
+    return history_page(f, 'download')
 
 
 @routes.route('/search', methods=['POST'])
@@ -129,7 +254,10 @@ def get_profile(f):
 def add_search(f):
     query = request.get_json().get('query')
     user = User.query.filter_by(id=f['user_id']).first()
-    user.add_search(query)
+    try:
+        user.add_search(query)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     return jsonify({"message": "Search added successfully"})
 
 
@@ -138,7 +266,10 @@ def add_search(f):
 def add_download(f):
     item = request.get_json().get('item')
     user = User.query.filter_by(id=f['user_id']).first()
-    user.add_download(item)
+    try:
+        user.add_download(item)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     return jsonify({"message": "Download added successfully"})
 
 
@@ -151,42 +282,60 @@ def send_feedback(f):
     return jsonify({"message": "Feedback sent successfully"})
 
 
-def get_summary(languages=None, video_url=None, num_sentences=2):
+def parse_budget_ms(data):
+    budget_ms = data.get('budget_ms')
+    if budget_ms is None:
+        return None
+    if isinstance(budget_ms, bool) or not isinstance(budget_ms, (int, float)) or budget_ms <= 0:
+        raise ValueError('budget_ms must be a positive number of milliseconds')
+    return budget_ms
+
+
+def get_summary(languages=None, video_url=None, num_sentences=2, budget_ms=None):
     logging.info(video_url)
     try:
-        yt = YouTube(video_url, 'WEB')
-        if yt.length > 7600:
-            print(yt.length)
-            return jsonify(error='Video too long'), 500
-        transcription = Transcription(video_url, languages)
-        transcripts = transcription.get_transcripts()
-        logging.info(transcripts)
-        summaries = {}
-        summarizer = TextSummarizer()
-        for lang in languages:
-            transcript_data = transcripts.get(lang, {'text': '', 'source_type': 'not_available'})
-            lang_entry = dict()
-            if transcript_data['source_type'] != 'not_available':
-                input_text = transcript_data['text']
-                lang_entry['transcript'] = input_text
-                lang_entry['extractive'] = summarizer.summarize(input_text, summary_type='extractive', num_sentences=num_sentences)
-                lang_entry['abstractive'] = summarizer.summarize(input_text, summary_type='abstractive')
-            else:
-                lang_entry['transcript'] = ''
-                lang_entry['extractive'] = ''
-                lang_entry['abstractive'] = ''
-            summaries[lang] = lang_entry
-        return jsonify(summaries)
+        return jsonify(run_summary(languages, video_url, num_sentences, budget_ms, client_key()))
+    except VideoTooLong as e:
+        print(e)
+        return jsonify(error='Video too long'), 500
+    except AdmissionRejected as e:
+        return jsonify(error=str(e)), 429, {'Retry-After': str(e.retry_after)}
+    except InferenceUnavailable as e:
+        return jsonify(error=str(e)), 503, {'Retry-After': '5'}
     except Exception as e:
         return jsonify(error=str(e)), 500
 
 
+@routes.route('/models/stats', methods=['GET'])
+def model_stats():
+    return jsonify(registry.stats())
+
+
+@routes.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+
+@routes.route('/inference/stats', methods=['GET'])
+def inference_stats():
+    return jsonify(inference_client.stats())
+
+
+@routes.route('/cache/stats', methods=['GET'])
+def cache_stats():
+    return jsonify(summary_cache.stats())
+
+
 @routes.route('/summary/english', methods=['POST'])
 def summary_english():
     data = request.get_json()
     video_url = data.get('video_url')
     num_sentences = data.get('num_sentences', 5)
-    return get_summary(['en'], video_url, num_sentences)
+    try:
+        budget_ms = parse_budget_ms(data)
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+    return get_summary(['en'], video_url, num_sentences, budget_ms)
 
 
 @routes.route('/summary/all', methods=['POST'])
@@ -195,4 +344,87 @@ def summary_all():
     video_url = data.get('video_url')
     languages = data.get('languages', ['en', 'hi', 'mr'])
     num_sentences = data.get('num_sentences', 5)
-    return get_summary(languages, video_url, num_sentences)
+    try:
+        budget_ms = parse_budget_ms(data)
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+    return get_summary(languages, video_url, num_sentences, budget_ms)
+
+
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@routes.route('/summary/stream', methods=['POST'])
+def summary_stream():
+    data = request.get_json()
+    video_url = data.get('video_url')
+    languages = data.get('languages', ['en', 'hi', 'mr'])
+    num_sentences = data.get('num_sentences', 5)
+    try:
+        budget_ms = parse_budget_ms(data)
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+    client = client_key()
+
+    def generate():
+        try:
+            for event in iter_summary(languages, video_url, num_sentences, budget_ms, client):
+                yield sse_event(event['stage'], event)
+        except VideoTooLong:
+            yield sse_event('error', {'error': 'Video too long'})
+        except AdmissionRejected as e:
+            yield sse_event('error', {'error': str(e), 'status': 429, 'retry_after': e.retry_after})
+        except Exception as e:
+            yield sse_event('error', {'error': str(e)})
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+@routes.route('/summary/batch', methods=['POST'])
+def summary_batch():
+    data = request.get_json()
+    video_urls = data.get('video_urls')
+    if not video_urls:
+        return jsonify({"error": "Missing fields"}), 400
+    # A bare string would otherwise be iterated character by character.
+    if not isinstance(video_urls, list) or not all(isinstance(url, str) and url.strip() for url in video_urls):
+        return jsonify({"error": "video_urls must be a list of URLs"}), 400
+    if len(video_urls) > MAX_BATCH_VIDEOS:
+        return jsonify({"error": f"At most {MAX_BATCH_VIDEOS} videos per batch"}), 400
+    languages = data.get('languages', ['en', 'hi', 'mr'])
+    num_sentences = data.get('num_sentences', 5)
+    client = client_key()
+
+    def generate():
+        try:
+            for event in iter_batch_summary(video_urls, languages, num_sentences, client=client):
+                yield sse_event('video', event)
+            yield sse_event('done', {'videos': len(set(video_urls))})
+        except Exception as e:
+            yield sse_event('error', {'error': str(e)})
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+@routes.route('/jobs/summary', methods=['POST'])
+def create_summary_job():
+    data = request.get_json()
+    video_url = data.get('video_url')
+    if not video_url:
+        return jsonify({"error": "Missing fields"}), 400
+    languages = data.get('languages', ['en', 'hi', 'mr'])
+    num_sentences = data.get('num_sentences', 5)
+    job = job_manager.submit(current_app._get_current_object(), languages, video_url, num_sentences,
+                             client_key())
+    return jsonify(job_id=job.id, status=job.status), 202
+
+
+@routes.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job.to_dict())
@@ -1,7 +1,9 @@
 from __init__ import create_app, db
+from models import ensure_history_schema
 
 if __name__ == '__main__':
     app = create_app()
     with app.app_context():
         db.create_all()
+        ensure_history_schema()
     app.run()
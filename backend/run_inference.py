@@ -0,0 +1,13 @@
+import logging
+import os
+
+from inference import DEFAULT_INFERENCE_ADDRESS, InferencePool, InferenceServer
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    pool = InferencePool(workers=int(os.environ.get('INFERENCE_WORKERS', '2')),
+                         threads_per_worker=int(os.environ.get('INFERENCE_THREADS', '2')),
+                         queue_size=int(os.environ.get('INFERENCE_QUEUE_SIZE', '32')))
+    server = InferenceServer(pool, os.environ.get('INFERENCE_ADDRESS', DEFAULT_INFERENCE_ADDRESS),
+                             os.environ.get('INFERENCE_AUTHKEY', 'your_inference_key').encode())
+    server.serve_forever()
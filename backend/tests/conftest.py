@@ -0,0 +1,53 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from __init__ import create_app, db  # noqa: E402
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'test.sqlite3'}",
+        'TESTING': True,
+        'HISTORY_FLUSH_INTERVAL': 0.05,
+    })
+    with app.app_context():
+        db.create_all()
+    yield app
+    from history import history_writer
+    history_writer.flush()
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def make_user(app):
+    from models import User
+
+    def make_user(username='alice'):
+        with app.app_context():
+            user = User(username=username, email=f'{username}@example.com')
+            user.set_password('secret')
+            db.session.add(user)
+            db.session.commit()
+            return user.id
+    return make_user
+
+
+@pytest.fixture
+def auth_headers():
+    from routes import generate_token
+
+    def auth_headers(user_id):
+        return {'Authorization': f'Bearer {generate_token(user_id)}'}
+    return auth_headers
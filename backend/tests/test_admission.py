@@ -0,0 +1,102 @@
+import threading
+import time
+
+import pytest
+
+from admission import AdmissionController, AdmissionRejected, estimate_cost
+from caching import summary_cache
+from utils.model_config import MODEL_VERSION
+from utils.youtube import video_length_cache
+
+VIDEO_ID = 'dQw4w9WgXcQ'
+
+
+def test_estimate_cost_scales_with_minutes_languages_and_asr():
+    assert estimate_cost(0, 1) == 1
+    assert estimate_cost(600, 3) == 30
+    assert estimate_cost(600, 1, asr=True) == 40
+
+
+def test_admits_within_budget_and_releases():
+    controller = AdmissionController(global_budget=10, user_budget=10)
+    with controller.admit(6, 'a'):
+        with controller.admit(4, 'b'):
+            assert controller.stats()['in_use'] == 10
+    assert controller.stats()['in_use'] == 0
+    assert controller.stats()['clients'] == 0
+
+
+def test_rejects_after_queue_timeout_with_retry_after():
+    controller = AdmissionController(global_budget=10, user_budget=10, queue_timeout=0.05)
+    with controller.admit(8, 'a'):
+        with pytest.raises(AdmissionRejected) as rejected:
+            with controller.admit(5, 'b'):
+                pass
+    assert rejected.value.reason == 'global'
+    assert rejected.value.retry_after >= 1
+
+
+def test_per_client_budget_rejects_only_that_client():
+    controller = AdmissionController(global_budget=100, user_budget=10, queue_timeout=0.05)
+    with controller.admit(8, 'a'):
+        with pytest.raises(AdmissionRejected) as rejected:
+            controller.acquire(5, 'a')
+        assert rejected.value.reason == 'user'
+        with controller.admit(5, 'b'):
+            pass
+
+
+def test_rejects_immediately_when_queue_is_full():
+    controller = AdmissionController(global_budget=10, max_waiting=0, queue_timeout=5)
+    with controller.admit(10, 'a'):
+        started = time.monotonic()
+        with pytest.raises(AdmissionRejected) as rejected:
+            controller.acquire(1, 'b')
+        assert time.monotonic() - started < 1
+    assert rejected.value.reason == 'queue_full'
+
+
+def test_oversized_request_runs_alone():
+    controller = AdmissionController(global_budget=10, user_budget=10)
+    with controller.admit(50, 'a'):
+        assert controller.stats()['in_use'] == 50
+
+
+def test_queued_request_is_admitted_on_release():
+    controller = AdmissionController(global_budget=10, queue_timeout=5)
+    admitted_at = controller.acquire(10, 'a')
+    admitted = threading.Event()
+
+    def waiter():
+        with controller.admit(5, 'b'):
+            admitted.set()
+    thread = threading.Thread(target=waiter)
+    thread.start()
+    time.sleep(0.05)
+    assert not admitted.is_set() and controller.stats()['waiting'] == 1
+    controller.release(10, 'a', admitted_at)
+    thread.join(2)
+    assert admitted.is_set()
+
+
+@pytest.fixture
+def saturated(app, monkeypatch):
+    from admission import admission_controller
+    monkeypatch.setattr(admission_controller, 'global_budget', 10)
+    monkeypatch.setattr(admission_controller, 'queue_timeout', 0.05)
+    # A cached transcript with a known length puts the request straight at the admission check.
+    with app.app_context():
+        summary_cache.set(VIDEO_ID, 'en', 'transcript', None, MODEL_VERSION, 'Some transcript text.')
+    video_length_cache.set(VIDEO_ID, 600)
+    admitted_at = admission_controller.acquire(10, 'someone-else')
+    yield admission_controller
+    admission_controller.release(10, 'someone-else', admitted_at)
+    summary_cache.memory.clear()
+    video_length_cache.delete(VIDEO_ID)
+
+
+def test_summary_over_capacity_returns_429_with_retry_after(client, saturated):
+    response = client.post('/summary/english', json={'video_url': f'https://www.youtube.com/watch?v={VIDEO_ID}'})
+    assert response.status_code == 429
+    assert int(response.headers['Retry-After']) >= 1
+    assert saturated.stats()['in_use'] == 10
@@ -0,0 +1,39 @@
+import pytest
+
+import assistant
+
+REPHRASE = "Could not process the response. Please rephrase your question."
+
+
+@pytest.fixture
+def remote_calls():
+    calls = []
+
+    def stub_remote(text_input):
+        calls.append(text_input)
+        return f'Remote answer to: {text_input}'
+
+    assistant.set_remote(stub_remote)
+    assistant.response_cache.clear()
+    yield calls
+    assistant.set_remote(None)
+    assistant.response_cache.clear()
+
+
+@pytest.mark.parametrize('text_input', [None, '', '   ', 42, ['pdf']])
+def test_bad_input_is_answered_without_remote_call(remote_calls, text_input):
+    assert assistant.assistant_response(text_input) == REPHRASE
+    assert remote_calls == []
+
+
+def test_assistant_endpoint_handles_missing_text(client, remote_calls):
+    response = client.post('/assistant', json={})
+    assert response.status_code == 200
+    assert response.get_json()['response'] == REPHRASE
+
+
+def test_remote_replies_are_cached(remote_calls):
+    first = assistant.assistant_response('Does it work with playlists?')
+    second = assistant.assistant_response('does it work with playlists')
+    assert first == second
+    assert len(remote_calls) == 1
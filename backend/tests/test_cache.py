@@ -0,0 +1,107 @@
+import time
+
+import pytest
+
+from caching import SummaryCache
+from models import SummaryCacheEntry
+from utils.cache import LRUCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(time, 'monotonic', clock)
+    monkeypatch.setattr(time, 'time', clock)
+    return clock
+
+
+def test_lru_entries_expire_after_ttl(clock):
+    cache = LRUCache(max_size=4, ttl=10)
+    cache.set('a', 1)
+    cache.set('b', 2, ttl=30)
+    clock.now += 9
+    assert cache.get('a') == 1
+    clock.now += 2
+    assert cache.get('a') is None
+    assert cache.get('b') == 2
+    assert len(cache) == 1
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(max_size=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1 and cache.get('c') == 3
+    assert cache.stats()['evictions'] == 1
+
+
+def test_lru_delete_and_clear():
+    cache = LRUCache()
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.delete('a')
+    assert cache.get('a') is None
+    cache.clear()
+    assert cache.get('b') is None
+
+
+def test_summary_cache_reads_through_to_disk(app):
+    cache = SummaryCache(ttl=60)
+    with app.app_context():
+        cache.set('vid', 'en', 'abstractive', None, 'v1', 'summary')
+        cache.memory.clear()
+        assert cache.get('vid', 'en', 'abstractive', None, 'v1') == 'summary'
+        assert cache.stats()['disk']['hits'] == 1
+        # The disk hit was promoted back into memory.
+        assert cache.memory.get(cache.make_key('vid', 'en', 'abstractive', None, 'v1')) == 'summary'
+
+
+def test_summary_cache_disk_entries_expire(app, clock):
+    cache = SummaryCache(ttl=60)
+    with app.app_context():
+        cache.set('vid', 'en', 'abstractive', None, 'v1', 'summary')
+        clock.now += 61
+        assert cache.get('vid', 'en', 'abstractive', None, 'v1') is None
+        cache.evict()
+        assert SummaryCacheEntry.query.count() == 0
+
+
+def test_summary_cache_is_keyed_on_model_version_and_sentences(app):
+    cache = SummaryCache()
+    with app.app_context():
+        cache.set('vid', 'en', 'extractive', 5, 'v1', 'five')
+        assert cache.get('vid', 'en', 'extractive', 3, 'v1') is None
+        assert cache.get('vid', 'en', 'extractive', 5, 'v2') is None
+        assert cache.get('vid', 'en', 'extractive', 5, 'v1') == 'five'
+
+
+def test_summary_cache_clear_drops_memory_and_disk(app):
+    cache = SummaryCache()
+    with app.app_context():
+        cache.set('vid', 'en', 'abstractive', None, 'v1', 'summary')
+        cache.clear()
+        assert cache.get('vid', 'en', 'abstractive', None, 'v1') is None
+        assert SummaryCacheEntry.query.count() == 0
+
+
+def test_summary_cache_evicts_oldest_rows_over_disk_size(app, clock):
+    cache = SummaryCache(disk_size=2, ttl=None)
+    with app.app_context():
+        for i in range(3):
+            cache.set(f'vid{i}', 'en', 'abstractive', None, 'v1', i)
+            clock.now += 1
+        cache.evict()
+        cache.memory.clear()
+        assert cache.get('vid0', 'en', 'abstractive', None, 'v1') is None
+        assert cache.get('vid2', 'en', 'abstractive', None, 'v1') == 2
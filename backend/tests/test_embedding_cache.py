@@ -0,0 +1,46 @@
+import os
+
+import numpy as np
+
+from utils.embedding_cache import EmbeddingCache
+
+
+def vectors(count, offset=0, dim=4):
+    return np.arange(offset, offset + count * dim, dtype=np.float32).reshape(count, dim)
+
+
+def test_evicted_rows_come_back_from_the_spill(tmp_path):
+    cache = EmbeddingCache(max_size=2, spill_path=str(tmp_path / 'spill'), spill_size=8)
+    sentences = ['one', 'two', 'three', 'four']
+    cache.set_many('m', sentences, vectors(4))
+    embeddings, missing = cache.get_many('m', sentences)
+    assert missing == []
+    np.testing.assert_array_equal(embeddings, vectors(4))
+    assert cache.stats()['spill_hits'] >= 2
+    # The spill file is unlinked once mapped, so nothing is left behind on disk.
+    assert os.listdir(tmp_path) == []
+
+
+def test_caches_sharing_a_spill_path_do_not_overwrite_each_other(tmp_path):
+    path = str(tmp_path / 'spill')
+    first = EmbeddingCache(max_size=1, spill_path=path, spill_size=4)
+    second = EmbeddingCache(max_size=1, spill_path=path, spill_size=4)
+    first.set_many('m', ['a', 'b'], vectors(2))
+    second.set_many('m', ['c', 'd'], vectors(2, offset=100))
+    embeddings, missing = first.get_many('m', ['a'])
+    assert missing == []
+    np.testing.assert_array_equal(embeddings[0], vectors(1)[0])
+
+
+def test_forked_child_spills_to_its_own_file(tmp_path):
+    cache = EmbeddingCache(max_size=1, spill_path=str(tmp_path / 'spill'), spill_size=1)
+    cache.set_many('m', ['parent', 'newest'], vectors(2))
+    pid = os.fork()
+    if pid == 0:
+        # Evicting in the child reuses spill slot 0, which the parent's 'parent' row lives in.
+        cache.set_many('m', ['child-a', 'child-b'], vectors(2, offset=500))
+        os._exit(0)
+    os.waitpid(pid, 0)
+    embeddings, missing = cache.get_many('m', ['parent'])
+    assert missing == []
+    np.testing.assert_array_equal(embeddings[0], vectors(1)[0])
@@ -0,0 +1,43 @@
+import pytest
+
+
+def search(client, headers, count):
+    for i in range(count):
+        assert client.post('/search', json={'query': f'query {i}'}, headers=headers).status_code == 200
+
+
+def test_pages_walk_newest_first_without_gaps(client, make_user, auth_headers):
+    headers = auth_headers(make_user())
+    search(client, headers, 7)
+    seen = []
+    cursor = None
+    while True:
+        url = '/history/search?limit=3' + (f'&cursor={cursor}' if cursor is not None else '')
+        response = client.get(url, headers=headers)
+        assert response.status_code == 200
+        page = response.get_json()
+        assert len(page['items']) <= 3
+        seen.extend(item['value'] for item in page['items'])
+        cursor = page['next_cursor']
+        if cursor is None:
+            break
+    assert seen == [f'query {i}' for i in range(6, -1, -1)]
+
+
+def test_pages_only_show_the_callers_history(client, make_user, auth_headers):
+    alice = auth_headers(make_user('alice'))
+    bob = auth_headers(make_user('bob'))
+    search(client, alice, 2)
+    search(client, bob, 1)
+    page = client.get('/history/search', headers=bob).get_json()
+    assert [item['value'] for item in page['items']] == ['query 0']
+    assert page['next_cursor'] is None
+
+
+@pytest.mark.parametrize('query', ['cursor=abc', 'limit=abc', 'cursor=1.5', 'limit='])
+def test_invalid_pagination_parameters_return_400(client, make_user, auth_headers, query):
+    headers = auth_headers(make_user())
+    response = client.get(f'/history/search?{query}', headers=headers)
+    assert response.status_code == 400
+    response = client.get(f'/history/download?{query}', headers=headers)
+    assert response.status_code == 400
@@ -0,0 +1,53 @@
+import time
+
+import pytest
+
+from __init__ import db
+from history import history_writer
+from models import SearchHistory, User
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return condition()
+
+
+def test_invalid_search_is_rejected_with_400(client, make_user, auth_headers):
+    headers = auth_headers(make_user())
+    assert client.post('/search', json={}, headers=headers).status_code == 400
+    assert client.post('/search', json={'query': '   '}, headers=headers).status_code == 400
+    assert client.post('/download', json={'item': 'x' * 300}, headers=headers).status_code == 400
+    assert history_writer.stats()['pending'] == 0
+
+
+def test_bad_row_does_not_block_other_users(app, client, make_user, auth_headers):
+    good_user = make_user('bob')
+    with app.app_context():
+        # Bypasses validation the way a row that only the database rejects would.
+        history_writer._pending.append((SearchHistory, {'user_id': None, 'query': 'broken'}, 0))
+    headers = auth_headers(good_user)
+    for i in range(5):
+        assert client.post('/search', json={'query': f'https://youtu.be/video{i}'}, headers=headers).status_code == 200
+    assert wait_for(lambda: history_writer.stats()['pending'] == 0)
+    with app.app_context():
+        assert db.session.get(User, good_user).get_search_count() == 5
+    assert history_writer.stats()['dropped'] >= 1
+
+
+def test_failed_rows_are_not_requeued_forever(app):
+    with app.app_context():
+        history_writer._pending.append((SearchHistory, {'user_id': None, 'query': 'broken'}, 0))
+        history_writer.flush()
+        assert history_writer.stats()['pending'] == 0
+
+
+def test_validate_requires_non_nullable_columns():
+    with pytest.raises(ValueError):
+        history_writer.validate(SearchHistory, {'user_id': 1, 'query': None})
+    with pytest.raises(ValueError):
+        history_writer.validate(SearchHistory, {'user_id': 1, 'query': 42})
+    history_writer.validate(SearchHistory, {'user_id': 1, 'query': 'ok'})
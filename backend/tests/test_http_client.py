@@ -0,0 +1,55 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from utils.http_client import make_session
+
+
+@pytest.fixture
+def server():
+    responses = []
+    hits = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            hits.append(self.path)
+            status, headers = responses.pop(0) if responses else (200, {})
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header('Content-Length', '2')
+            self.end_headers()
+            self.wfile.write(b'ok')
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    httpd.responses = responses
+    httpd.hits = hits
+    httpd.url = f'http://127.0.0.1:{httpd.server_address[1]}/'
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_throttling_fails_fast_instead_of_honouring_retry_after(server):
+    server.responses.append((429, {'Retry-After': '3600'}))
+    started = time.monotonic()
+    response = make_session().get(server.url)
+    assert response.status_code == 429
+    assert time.monotonic() - started < 2
+    assert len(server.hits) == 1
+
+
+def test_server_errors_are_retried_with_capped_backoff(server):
+    server.responses.extend([(503, {'Retry-After': '3600'}), (503, {})])
+    started = time.monotonic()
+    response = make_session(backoff=10, backoff_max=0.1).get(server.url)
+    assert response.status_code == 200
+    assert time.monotonic() - started < 2
+    assert len(server.hits) == 3
@@ -0,0 +1,124 @@
+import os
+import threading
+import time
+
+import pytest
+
+import inference
+from inference import InferenceClient, InferencePool, InferenceQueueFull, InferenceServer, InferenceTimeout, \
+    InferenceUnavailable, InferenceWorkerDied
+
+
+def fake_worker_main(current, requests, results, threads, backend):
+    while True:
+        item = requests.get()
+        if item is None:
+            break
+        request_id, method, args = item
+        current.value = request_id.encode()
+        if method == 'crash':
+            os._exit(1)
+        if method == 'sleep':
+            time.sleep(args[0])
+        results.put((request_id, True, args))
+        current.value = b''
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setattr(inference, '_worker_main', fake_worker_main)
+    monkeypatch.setattr(InferencePool, '_load_models', lambda self: None)
+    pool = InferencePool(workers=1, queue_size=4, call_timeout=5, monitor_interval=0.05)
+    pool.start()
+    yield pool
+    pool.shutdown()
+
+
+def test_call_returns_worker_result(pool):
+    assert pool.call('echo', 1, 2) == (1, 2)
+
+
+def test_dead_worker_fails_its_requests_and_is_restarted(pool):
+    with pytest.raises(InferenceWorkerDied):
+        pool.call('crash')
+    assert pool.call('echo', 'again') == ('again',)
+    assert pool.stats()['restarts'] == 1
+
+
+def test_call_times_out(pool):
+    with pytest.raises(InferenceTimeout):
+        pool.call('sleep', 1.0, timeout=0.1)
+    assert pool.stats()['pending'] == 0
+
+
+@pytest.fixture
+def server(monkeypatch, tmp_path):
+    monkeypatch.setattr(inference, '_worker_main', fake_worker_main)
+    monkeypatch.setattr(InferencePool, '_load_models', lambda self: None)
+    pool = InferencePool(workers=1, queue_size=1, submit_timeout=0.1, monitor_interval=0.05)
+    server = InferenceServer(pool, str(tmp_path / 'inference.sock'), b'test-key', methods={'echo', 'sleep', 'crash'})
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    assert server.ready.wait(5)
+    yield server
+    server.shutdown()
+    thread.join(5)
+
+
+@pytest.fixture
+def client(server):
+    return InferenceClient(server.address, b'test-key', call_timeout=5)
+
+
+def test_client_calls_go_through_the_server(client):
+    assert client.call('echo', 1, 2) == (1, 2)
+    stats = client.stats()
+    assert stats['connected'] and stats['server']['workers'] == 1
+
+
+def test_server_rejects_unknown_methods(client):
+    with pytest.raises(RuntimeError, match='Unknown inference method'):
+        client.call('rank_everything')
+
+
+def test_worker_death_reaches_the_client(client):
+    with pytest.raises(InferenceWorkerDied):
+        client.call('crash')
+    assert client.call('echo', 'again') == ('again',)
+
+
+def test_full_server_queue_rejects_calls(client):
+    errors = []
+
+    def call():
+        try:
+            client.call('sleep', 0.5)
+        except InferenceQueueFull as e:
+            errors.append(e)
+    threads = [threading.Thread(target=call) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.05)
+    for thread in threads:
+        thread.join(5)
+    assert len(errors) >= 1
+    assert client.stats()['rejected'] >= 1
+
+
+def test_unreachable_server_is_unavailable(tmp_path):
+    client = InferenceClient(str(tmp_path / 'missing.sock'), b'test-key', call_timeout=1)
+    with pytest.raises(InferenceUnavailable):
+        client.call('echo')
+
+
+def test_forked_process_gets_its_own_connection(client):
+    assert client.call('echo', 'parent') == ('parent',)
+    pid = os.fork()
+    if pid == 0:
+        try:
+            os._exit(0 if client.call('echo', 'child', timeout=5) == ('child',) else 1)
+        except BaseException:
+            os._exit(2)
+    _, status = os.waitpid(pid, 0)
+    assert os.WEXITSTATUS(status) == 0
+    assert client.call('echo', 'parent') == ('parent',)
@@ -0,0 +1,87 @@
+import json
+import threading
+
+import pytest
+
+import jobs
+from jobs import Job, JobManager
+
+
+@pytest.fixture
+def release(monkeypatch):
+    release = threading.Event()
+    calls = []
+
+    def fake_summary(languages, video_url, num_sentences, client=None):
+        calls.append(video_url)
+        release.wait(5)
+        yield {'stage': 'done', 'lang': None, 'seconds': 0.0, 'data': {'video_url': video_url}}
+    monkeypatch.setattr(jobs, 'iter_summary', fake_summary)
+    release.calls = calls
+    yield release
+    release.set()
+
+
+def test_links_to_the_same_video_share_one_job(app, release):
+    manager = JobManager()
+    first = manager.submit(app, ['en', 'hi'], 'https://www.youtube.com/watch?v=dQw4w9WgXcQ', 5)
+    for video_url in ('https://youtu.be/dQw4w9WgXcQ', 'https://www.youtube.com/watch?v=dQw4w9WgXcQ&t=5'):
+        assert manager.submit(app, ['hi', 'en'], video_url, 5) is first
+    assert manager.stats()['inflight'] == 1
+    release.set()
+    manager.executor.shutdown(wait=True)
+    assert first.status == 'done'
+    assert len(release.calls) == 1
+
+
+def test_different_requests_get_separate_jobs(app, release):
+    manager = JobManager()
+    first = manager.submit(app, ['en'], 'https://youtu.be/dQw4w9WgXcQ', 5)
+    assert manager.submit(app, ['en'], 'https://youtu.be/dQw4w9WgXcQ', 3) is not first
+    assert manager.submit(app, ['en', 'hi'], 'https://youtu.be/dQw4w9WgXcQ', 5) is not first
+    assert manager.submit(app, ['en'], 'https://youtu.be/aaaaaaaaaaa', 5) is not first
+    release.set()
+    manager.executor.shutdown(wait=True)
+
+
+def test_finished_job_is_not_reused(app, release):
+    manager = JobManager()
+    release.set()
+    first = manager.submit(app, ['en'], 'https://youtu.be/dQw4w9WgXcQ', 5)
+    manager.executor.shutdown(wait=True)
+    manager._executor = None
+    second = manager.submit(app, ['en'], 'https://youtu.be/dQw4w9WgXcQ', 5)
+    assert second is not first
+    manager.executor.shutdown(wait=True)
+    assert manager.get(first.id).result == {'video_url': 'https://youtu.be/dQw4w9WgXcQ'}
+
+
+def test_partial_includes_cached_languages_and_is_a_copy():
+    job = Job('key', ['en', 'hi'], 'https://youtu.be/dQw4w9WgXcQ', 5)
+    job.record({'stage': 'cached', 'lang': 'en', 'seconds': 0.0,
+                'data': {'transcript': 't', 'extractive': 'e', 'abstractive': 'a'}})
+    job.record({'stage': 'extractive', 'lang': 'hi', 'seconds': 0.1, 'data': 'hi-e'})
+    snapshot = job.to_dict()
+    assert snapshot['partial'] == {'en': {'extractive': 'e', 'abstractive': 'a'}, 'hi': {'extractive': 'hi-e'}}
+    job.record({'stage': 'abstractive', 'lang': 'hi', 'seconds': 0.1, 'data': 'hi-a'})
+    assert snapshot['partial']['hi'] == {'extractive': 'hi-e'}
+    assert len(snapshot['stages']) == 2
+
+
+def test_to_dict_is_safe_while_the_job_records(app):
+    job = Job('key', ['en'], 'https://youtu.be/dQw4w9WgXcQ', 5)
+    stop = threading.Event()
+
+    def record():
+        i = 0
+        while not stop.is_set():
+            job.record({'stage': 'extractive', 'lang': f'lang{i}', 'seconds': 0.0, 'data': 'x'})
+            i += 1
+    thread = threading.Thread(target=record)
+    thread.start()
+    try:
+        for _ in range(200):
+            json.dumps(job.to_dict())
+    finally:
+        stop.set()
+        thread.join(5)
@@ -0,0 +1,44 @@
+import pytest
+
+import routes
+from pipeline import MAX_BATCH_VIDEOS
+
+
+@pytest.fixture
+def batches(monkeypatch):
+    seen = []
+
+    def fake_batch(video_urls, languages, num_sentences, client=None):
+        seen.append(list(video_urls))
+        for video_url in dict.fromkeys(video_urls):
+            yield {'video_url': video_url, 'status': 'done'}
+    monkeypatch.setattr(routes, 'iter_batch_summary', fake_batch)
+    return seen
+
+
+@pytest.mark.parametrize('video_urls', [
+    'https://youtu.be/abc',
+    ['https://youtu.be/abc', 42],
+    ['https://youtu.be/abc', '  '],
+    {'url': 'https://youtu.be/abc'},
+    ['https://youtu.be/v%d' % i for i in range(MAX_BATCH_VIDEOS + 1)],
+])
+def test_invalid_video_urls_return_400(client, batches, video_urls):
+    response = client.post('/summary/batch', json={'video_urls': video_urls})
+    assert response.status_code == 400
+    assert batches == []
+
+
+def test_missing_video_urls_return_400(client, batches):
+    assert client.post('/summary/batch', json={}).status_code == 400
+    assert client.post('/summary/batch', json={'video_urls': []}).status_code == 400
+
+
+def test_valid_batch_streams_each_video(client, batches):
+    urls = ['https://youtu.be/abc', 'https://youtu.be/def', 'https://youtu.be/abc']
+    response = client.post('/summary/batch', json={'video_urls': urls})
+    assert response.status_code == 200
+    body = response.get_data(as_text=True)
+    assert body.count('event: video') == 2
+    assert 'event: done' in body
+    assert batches == [urls]
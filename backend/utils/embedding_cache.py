@@ -0,0 +1,159 @@
+import hashlib
+import os
+import re
+import tempfile
+import threading
+import unicodedata
+from collections import OrderedDict
+
+import numpy as np
+
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+
+def normalize_sentence(sentence):
+    return WHITESPACE_PATTERN.sub(' ', unicodedata.normalize('NFC', sentence)).strip()
+
+
+def sentence_key(model_id, sentence):
+    return hashlib.blake2b(f'{model_id}\0{normalize_sentence(sentence)}'.encode('utf-8'), digest_size=16).digest()
+
+
+class EmbeddingCache:
+    # A bounded LRU of sentence embeddings, kept as float16 rows of one preallocated array. With a
+    # spill_path, rows evicted from memory go to a memory-mapped ring of spill_size rows and are
+    # promoted back on their next hit. Each process spills to its own file next to spill_path.
+    def __init__(self, max_size=50000, spill_path=None, spill_size=200000, dtype=np.float16):
+        self.max_size = max_size
+        self.spill_path = spill_path
+        self.spill_size = spill_size
+        self.dtype = np.dtype(dtype)
+        self.dim = None
+        self._vectors = None
+        self._slots = OrderedDict()
+        self._free = []
+        self._spill = None
+        self._spill_slots = {}
+        self._spill_keys = None
+        self._spill_next = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.spill_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # A forked child (gunicorn or inference workers) inherits the parent's MAP_SHARED spill mapping;
+        # writing to it would overwrite rows the parent's slot map still points at.
+        os.register_at_fork(after_in_child=self._after_fork)
+
+    def _open_spill(self, dim):
+        directory, name = os.path.split(os.path.abspath(self.spill_path))
+        fd, path = tempfile.mkstemp(prefix=f'{name}.{os.getpid()}.', dir=directory)
+        os.close(fd)
+        try:
+            return np.memmap(path, dtype=self.dtype, mode='w+', shape=(self.spill_size, dim))
+        finally:
+            # The mapping outlives the name, so the file goes away with the process.
+            os.unlink(path)
+
+    def _after_fork(self):
+        self._lock = threading.Lock()
+        if self._spill is not None:
+            self._spill = self._open_spill(self.dim)
+            self._spill_slots = {}
+            self._spill_keys = [None] * self.spill_size
+            self._spill_next = 0
+
+    def _allocate(self, dim):
+        self.dim = dim
+        self._vectors = np.zeros((self.max_size, dim), dtype=self.dtype)
+        self._free = list(range(self.max_size - 1, -1, -1))
+        if self.spill_path:
+            self._spill = self._open_spill(dim)
+            self._spill_keys = [None] * self.spill_size
+
+    def _spill_row(self, key, row):
+        slot = self._spill_next
+        self._spill_next = (slot + 1) % self.spill_size
+        previous = self._spill_keys[slot]
+        if previous is not None:
+            self._spill_slots.pop(previous, None)
+        self._spill[slot] = row
+        self._spill_keys[slot] = key
+        self._spill_slots[key] = slot
+
+    def _store(self, key, vector):
+        slot = self._slots.get(key)
+        if slot is None:
+            if self._free:
+                slot = self._free.pop()
+            else:
+                evicted, slot = self._slots.popitem(last=False)
+                self.evictions += 1
+                if self._spill is not None:
+                    self._spill_row(evicted, self._vectors[slot])
+            self._slots[key] = slot
+        self._slots.move_to_end(key)
+        self._vectors[slot] = vector
+
+    def get_many(self, model_id, sentences):
+        # Returns float32 rows for the cached sentences plus the indices that still need embedding.
+        keys = [sentence_key(model_id, sentence) for sentence in sentences]
+        missing = []
+        with self._lock:
+            if self.dim is None:
+                self.misses += len(sentences)
+                return None, list(range(len(sentences)))
+            embeddings = np.zeros((len(sentences), self.dim), dtype=np.float32)
+            for i, key in enumerate(keys):
+                slot = self._slots.get(key)
+                if slot is not None:
+                    self._slots.move_to_end(key)
+                    embeddings[i] = self._vectors[slot]
+                    self.hits += 1
+                    continue
+                spill_slot = self._spill_slots.pop(key, None)
+                if spill_slot is not None:
+                    self._spill_keys[spill_slot] = None
+                    embeddings[i] = self._spill[spill_slot]
+                    self._store(key, embeddings[i])
+                    self.spill_hits += 1
+                    continue
+                missing.append(i)
+                self.misses += 1
+        return embeddings, missing
+
+    def set_many(self, model_id, sentences, embeddings):
+        keys = [sentence_key(model_id, sentence) for sentence in sentences]
+        with self._lock:
+            if self.dim is None:
+                self._allocate(embeddings.shape[1])
+            for key, vector in zip(keys, embeddings):
+                self._store(key, vector)
+
+    def clear(self):
+        with self._lock:
+            self._slots.clear()
+            self._spill_slots.clear()
+            if self._vectors is not None:
+                self._free = list(range(self.max_size - 1, -1, -1))
+            if self._spill_keys is not None:
+                self._spill_keys = [None] * self.spill_size
+
+    def __len__(self):
+        return len(self._slots)
+
+    def stats(self):
+        total = self.hits + self.spill_hits + self.misses
+        return {
+            'size': len(self._slots),
+            'max_size': self.max_size,
+            'spill_size': len(self._spill_slots),
+            'hits': self.hits + self.spill_hits,
+            'spill_hits': self.spill_hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': round((self.hits + self.spill_hits) / total, 3) if total else 0.0,
+            'dtype': self.dtype.name,
+            'memory_bytes': 0 if self._vectors is None else self._vectors.nbytes,
+            'spill_bytes': 0 if self._spill is None else self._spill.nbytes,
+        }
@@ -0,0 +1,74 @@
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from utils.youtube import record_video_metadata
+
+HTTP_POOL_CONNECTIONS = int(os.environ.get('HTTP_POOL_CONNECTIONS', '10'))
+HTTP_POOL_MAXSIZE = int(os.environ.get('HTTP_POOL_MAXSIZE', '20'))
+HTTP_CONNECT_TIMEOUT = float(os.environ.get('HTTP_CONNECT_TIMEOUT', '3.05'))
+HTTP_READ_TIMEOUT = float(os.environ.get('HTTP_READ_TIMEOUT', '15'))
+HTTP_RETRIES = int(os.environ.get('HTTP_RETRIES', '3'))
+HTTP_READ_RETRIES = int(os.environ.get('HTTP_READ_RETRIES', '1'))
+HTTP_BACKOFF = float(os.environ.get('HTTP_BACKOFF', '0.3'))
+HTTP_BACKOFF_MAX = float(os.environ.get('HTTP_BACKOFF_MAX', '2'))
+# 429 is not retried: YouTube throttling lasts far longer than a request can wait, so fail fast and let
+# the caller report the language as a (not cached) error.
+RETRY_STATUSES = (500, 502, 503, 504)
+
+
+class PooledSession(requests.Session):
+    # requests has no session-wide timeout, so apply one to every call that doesn't pass its own.
+    def __init__(self, timeout):
+        super().__init__()
+        self.timeout = timeout
+        self.requests_sent = 0
+        self._lock = threading.Lock()
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        with self._lock:
+            self.requests_sent += 1
+        return super().request(method, url, **kwargs)
+
+    def stats(self):
+        connections = 0
+        for adapter in self.adapters.values():
+            for pool in list(adapter.poolmanager.pools._container.values()):
+                connections += pool.num_connections
+        return {'requests': self.requests_sent, 'connections_opened': connections}
+
+
+def make_session(pool_connections=HTTP_POOL_CONNECTIONS, pool_maxsize=HTTP_POOL_MAXSIZE,
+                 timeout=(HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT), retries=HTTP_RETRIES,
+                 read_retries=HTTP_READ_RETRIES, backoff=HTTP_BACKOFF, backoff_max=HTTP_BACKOFF_MAX):
+    session = PooledSession(timeout)
+    # The YouTube clients only read, so POSTs (innertube player calls) are as safe to retry as GETs.
+    # Retry-After is ignored and backoff is capped: callers hold admission budget while they wait, so
+    # the worst case stays at (read_retries + 1) read timeouts plus a few seconds of backoff.
+    retry = Retry(total=retries, connect=retries, read=read_retries, backoff_factor=backoff, backoff_max=backoff_max,
+                  status_forcelist=RETRY_STATUSES, allowed_methods=frozenset({'GET', 'HEAD', 'POST'}),
+                  respect_retry_after_header=False, raise_on_status=False)
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=retry)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers['Accept-Language'] = 'en-US'
+    return session
+
+
+_shared_session = None
+_shared_session_lock = threading.Lock()
+
+
+def get_session():
+    global _shared_session
+    if _shared_session is None:
+        with _shared_session_lock:
+            if _shared_session is None:
+                session = make_session()
+                session.hooks['response'].append(record_video_metadata)
+                _shared_session = session
+    return _shared_session
@@ -0,0 +1,126 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from flask import g, has_request_context
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{value}"' for key, value in labels) + '}'
+
+
+class Histogram:
+    def __init__(self, name, documentation, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            if index < len(self.buckets):
+                series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            series = {key: (list(counts), total, count) for key, (counts, total, count) in self._series.items()}
+        for key, (counts, total, count) in sorted(series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f'{self.name}_bucket{_format_labels(key + (("le", bound),))} {cumulative}')
+            lines.append(f'{self.name}_bucket{_format_labels(key + (("le", "+Inf"),))} {count}')
+            lines.append(f'{self.name}_sum{_format_labels(key)} {total}')
+            lines.append(f'{self.name}_count{_format_labels(key)} {count}')
+        return lines
+
+
+class Counter:
+    def __init__(self, name, documentation):
+        self.name = name
+        self.documentation = documentation
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        with self._lock:
+            values = dict(self._values)
+        for key, value in sorted(values.items()):
+            lines.append(f'{self.name}{_format_labels(key)} {value}')
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+
+    def histogram(self, name, documentation, buckets=DEFAULT_BUCKETS):
+        if name not in self._metrics:
+            self._metrics[name] = Histogram(name, documentation, buckets)
+        return self._metrics[name]
+
+    def counter(self, name, documentation):
+        if name not in self._metrics:
+            self._metrics[name] = Counter(name, documentation)
+        return self._metrics[name]
+
+    def register_collector(self, collector):
+        # Collectors run at scrape time and return (name, type, documentation, [(labels, value), ...]).
+        self._collectors.append(collector)
+
+    def render(self):
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            for name, metric_type, documentation, samples in collector():
+                lines.append(f'# HELP {name} {documentation}')
+                lines.append(f'# TYPE {name} {metric_type}')
+                for labels, value in samples:
+                    lines.append(f'{name}{_format_labels(tuple(sorted(labels.items())))} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+metrics = MetricsRegistry()
+stage_seconds = metrics.histogram('summary_stage_seconds', 'Time spent in each summary pipeline stage.')
+
+
+def observe_stage(stage, seconds):
+    stage_seconds.observe(seconds, stage=stage)
+    if has_request_context():
+        timings = g.setdefault('stage_timings', {})
+        timings[stage] = timings.get(stage, 0.0) + seconds
+
+
+@contextmanager
+def timed(stage):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(stage, time.perf_counter() - started)
+
+
+def server_timing_header(timings):
+    return ', '.join(f'{stage};dur={seconds * 1000:.1f}' for stage, seconds in timings.items())
@@ -0,0 +1,8 @@
+import os
+
+# Kept free of torch/transformers imports so the web layer can build cache keys without loading the ML stack.
+MT5_MODEL_NAME = "csebuetnlp/mT5_multilingual_XLSum"
+BERT_MODEL_NAME = "google-bert/bert-base-multilingual-cased"
+INFERENCE_BACKENDS = ('torch', 'quantized', 'onnx')
+INFERENCE_BACKEND = os.environ.get('INFERENCE_BACKEND', 'torch')
+MODEL_VERSION = f"{MT5_MODEL_NAME}+{BERT_MODEL_NAME}:meanpool-v1:mapreduce-v1:{INFERENCE_BACKEND}"
@@ -0,0 +1,94 @@
+import logging
+import threading
+import time
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+
+def _peak_rss_mb():
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _object_size_mb(obj):
+    items = obj if isinstance(obj, (tuple, list)) else (obj,)
+    total = 0
+    for item in items:
+        if hasattr(item, 'parameters'):
+            total += sum(p.numel() * p.element_size() for p in item.parameters())
+            total += sum(b.numel() * b.element_size() for b in item.buffers())
+    return total / (1024 * 1024)
+
+
+class ModelRegistry:
+    def __init__(self):
+        self._loaders = {}
+        self._instances = {}
+        self._locks = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, loader):
+        with self._lock:
+            self._loaders[name] = loader
+            self._locks.setdefault(name, threading.Lock())
+
+    def get(self, name, loader=None):
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+        if loader is not None and name not in self._loaders:
+            self.register(name, loader)
+        with self._locks[name]:
+            instance = self._instances.get(name)
+            if instance is None:
+                instance = self._load(name)
+        return instance
+
+    def _load(self, name):
+        rss_before = _peak_rss_mb()
+        start = time.perf_counter()
+        instance = self._loaders[name]()
+        elapsed = time.perf_counter() - start
+        rss_after = _peak_rss_mb()
+        self._stats[name] = {
+            'load_seconds': round(elapsed, 3),
+            'size_mb': round(_object_size_mb(instance), 1),
+            'peak_rss_delta_mb': None if rss_before is None else round(rss_after - rss_before, 1),
+            'loaded_at': time.time(),
+        }
+        self._instances[name] = instance
+        logger.info(f"Loaded {name} in {elapsed:.2f}s")
+        return instance
+
+    def is_loaded(self, name):
+        return name in self._instances
+
+    def warm_up(self, names=None):
+        for name in names or list(self._loaders):
+            self.get(name)
+
+    def clear(self, name=None):
+        with self._lock:
+            if name is None:
+                self._instances.clear()
+                self._stats.clear()
+            else:
+                self._instances.pop(name, None)
+                self._stats.pop(name, None)
+
+    def stats(self):
+        return {
+            'models': {name: dict(stat) for name, stat in self._stats.items()},
+            'registered': sorted(self._loaders),
+            'peak_rss_mb': None if resource is None else round(_peak_rss_mb(), 1),
+        }
+
+
+registry = ModelRegistry()
@@ -0,0 +1,16 @@
+# Kept free of model imports so cached rankings can be sliced without loading the ML stack.
+
+
+def make_ranking(sentences, scores):
+    # Ties keep the original ranking behaviour: equal scores put the later sentence first.
+    order = [idx for _, idx in sorted(((score, idx) for idx, score in enumerate(scores)), reverse=True)]
+    return {'sentences': list(sentences), 'scores': [round(float(score), 6) for score in scores], 'order': order}
+
+
+def select_ranked_sentences(ranking, num_sentences):
+    sentences = ranking['sentences']
+    if num_sentences > 0 and len(sentences) > num_sentences:
+        selected_indices = sorted(ranking['order'][:num_sentences])
+    else:
+        selected_indices = range(len(sentences))
+    return ' '.join(sentences[idx] for idx in selected_indices)
@@ -1,29 +1,141 @@
+import math
+import os
 import re
+import threading
+import time
+from functools import partial
 
 import nltk
 import numpy as np
 import torch
 from nltk.tokenize import sent_tokenize
 from sklearn.metrics.pairwise import cosine_similarity
-from transformers import AutoTokenizer, AutoModelForSeq2SeqLM, AutoModelForMaskedLM
+from transformers import AutoTokenizer, AutoModelForSeq2SeqLM, AutoModelForMaskedLM, StoppingCriteria, \
+    StoppingCriteriaList
+
+from utils.model_config import BERT_MODEL_NAME, INFERENCE_BACKEND, INFERENCE_BACKENDS, MODEL_VERSION, \
+    MT5_MODEL_NAME
+from utils.embedding_cache import EmbeddingCache, normalize_sentence
+from utils.model_registry import registry
+from utils.ranking import make_ranking, select_ranked_sentences
+
+DEVICE = 'cuda' if torch.cuda.is_available() else 'cpu'
+EMBEDDING_BATCH_SIZE = 32
+ABSTRACTIVE_CHUNK_TOKENS = 512
+ABSTRACTIVE_BATCH_SIZE = 4
+ABSTRACTIVE_NUM_BEAMS = 4
+ABSTRACTIVE_MAX_ROUNDS = 3
+ABSTRACTIVE_MIN_LENGTH = 40
+ABSTRACTIVE_MAX_LENGTH = 200
+# (num_beams, max_new_tokens) from best to cheapest; a budgeted request takes the first one predicted to fit.
+DECODING_LADDER = ((ABSTRACTIVE_NUM_BEAMS, ABSTRACTIVE_MAX_LENGTH), (2, ABSTRACTIVE_MAX_LENGTH),
+                   (1, ABSTRACTIVE_MAX_LENGTH), (1, 120), (1, 60))
+DECODING_BUDGET_SHARE = 0.8
+BEAM_COST_FACTOR = 0.5
+INITIAL_STEP_SECONDS = 0.005 if DEVICE == 'cuda' else 0.03
+EMBEDDING_CACHE_SIZE = int(os.environ.get('EMBEDDING_CACHE_SIZE', '20000'))
+
+embedding_cache = EmbeddingCache(max_size=EMBEDDING_CACHE_SIZE, spill_path=os.environ.get('EMBEDDING_CACHE_SPILL'))
+
+
+def _quantize(model):
+    # Dynamic int8 quantization only has CPU kernels, so the model stays on the CPU.
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def _import_onnx_runtime():
+    try:
+        from optimum import onnxruntime
+    except ImportError:
+        raise ImportError("The 'onnx' inference backend requires optimum[onnxruntime]: "
+                          "pip install optimum[onnxruntime]")
+    return onnxruntime
+
+
+def _load_mt5(backend='torch'):
+    tokenizer = AutoTokenizer.from_pretrained(MT5_MODEL_NAME)
+    if backend == 'onnx':
+        model = _import_onnx_runtime().ORTModelForSeq2SeqLM.from_pretrained(MT5_MODEL_NAME, export=True)
+        return model, tokenizer
+    model = AutoModelForSeq2SeqLM.from_pretrained(MT5_MODEL_NAME)
+    model.eval()
+    if backend == 'quantized':
+        return _quantize(model), tokenizer
+    model.to(DEVICE)
+    return model, tokenizer
+
+
+def _load_bert(backend='torch'):
+    tokenizer = AutoTokenizer.from_pretrained(BERT_MODEL_NAME)
+    if backend == 'onnx':
+        model = _import_onnx_runtime().ORTModelForFeatureExtraction.from_pretrained(BERT_MODEL_NAME, export=True)
+        return model, tokenizer
+    model = AutoModelForMaskedLM.from_pretrained(BERT_MODEL_NAME)
+    model.eval()
+    if backend == 'quantized':
+        return _quantize(model), tokenizer
+    model.to(DEVICE)
+    return model, tokenizer
+
+
+def _load_punkt():
+    nltk.download('punkt', quiet=True)
+    nltk.download('punkt_tab', quiet=True)
+    return True
+
+
+for _backend in INFERENCE_BACKENDS:
+    registry.register(f'mt5:{_backend}', partial(_load_mt5, _backend))
+    registry.register(f'bert:{_backend}', partial(_load_bert, _backend))
+registry.register('punkt', _load_punkt)
+
+
+class DeadlineCriteria(StoppingCriteria):
+    def __init__(self, deadline):
+        self.deadline = deadline
+        self.triggered = False
+
+    def expired(self):
+        return time.time() >= self.deadline
+
+    def __call__(self, input_ids, scores, **kwargs):
+        # Ending here lets generate finalize the best hypotheses so far instead of losing the chunk.
+        done = self.expired()
+        self.triggered = self.triggered or done
+        return torch.full((input_ids.shape[0],), done, dtype=torch.bool, device=input_ids.device)
+
+
+def _beam_cost(num_beams):
+    return 1 + BEAM_COST_FACTOR * (num_beams - 1)
 
 
 class TextSummarizer:
-    def __init__(self):
-        self.device = 'cuda' if torch.cuda.is_available() else 'cpu'
-        self.model_mt5_name = "csebuetnlp/mT5_multilingual_XLSum"
-        self.model_bert_name = "google-bert/bert-base-multilingual-cased"
+    def __init__(self, embedding_batch_size=EMBEDDING_BATCH_SIZE, chunk_tokens=ABSTRACTIVE_CHUNK_TOKENS,
+                 generation_batch_size=ABSTRACTIVE_BATCH_SIZE, num_beams=ABSTRACTIVE_NUM_BEAMS,
+                 backend=INFERENCE_BACKEND, embedding_cache=embedding_cache):
+        if backend not in INFERENCE_BACKENDS:
+            raise ValueError(f"Unknown inference backend {backend!r}, expected one of {INFERENCE_BACKENDS}")
+        self.backend = backend
+        self.device = DEVICE if backend == 'torch' else 'cpu'
+        self.model_mt5_name = MT5_MODEL_NAME
+        self.model_bert_name = BERT_MODEL_NAME
+        self.embedding_batch_size = embedding_batch_size
+        self.chunk_tokens = chunk_tokens
+        self.generation_batch_size = generation_batch_size
+        self.num_beams = num_beams
+        self.embedding_cache = embedding_cache
+        # Running estimate of seconds per decoded token for one greedy sequence, used to fit budgets.
+        self.step_seconds = INITIAL_STEP_SECONDS
+        self._step_lock = threading.Lock()
+        self.embedding_model_id = f'{BERT_MODEL_NAME}:{backend}:meanpool-v1'
         self._initialize_models()
 
     def _initialize_models(self):
-        self.model_mt5 = AutoModelForSeq2SeqLM.from_pretrained(self.model_mt5_name)
-        self.tokenizer_mt5 = AutoTokenizer.from_pretrained(self.model_mt5_name)
-        self.model_mt5.to(self.device)
-        self.model_bert = AutoModelForMaskedLM.from_pretrained(self.model_bert_name)
-        self.tokenizer_bert = AutoTokenizer.from_pretrained(self.model_bert_name)
-        self.model_bert.to(self.device)
-        nltk.download('punkt', quiet=True)
-        nltk.download('punkt_tab', quiet=True)
+        self.model_mt5, self.tokenizer_mt5 = registry.get(f'mt5:{self.backend}')
+        self.model_bert, self.tokenizer_bert = registry.get(f'bert:{self.backend}')
+        # ONNX feature-extraction graphs already stop at the encoder; torch models carry the MLM head.
+        self.bert_encoder = self.model_bert if self.backend == 'onnx' else self.model_bert.base_model
+        registry.get('punkt')
 
     def _whitespace_handler(self, text):
         return re.sub(r'\s+', ' ', text.strip())
@@ -33,61 +145,240 @@ class TextSummarizer:
         text = text.replace('।', '.')
         return text
 
-    def get_extractive_summary(self, text, num_sentences):
-        text = self._preprocess_text(text)
-        sentences = sent_tokenize(text)
-        if len(sentences) <= num_sentences:
-            return text
-        sentence_embeddings = []
-        for sent in sentences:
-            inputs = self.tokenizer_bert(sent, return_tensors='pt', truncation=True, max_length=512)
+    def embed_sentences(self, sentences):
+        if self.embedding_cache is None:
+            return self._embed_sentences(sentences)
+        embeddings, missing = self.embedding_cache.get_many(self.embedding_model_id, sentences)
+        if not missing:
+            return embeddings
+        # Captions repeat intros and sponsor reads, so only embed each distinct missing sentence once.
+        unique = {}
+        for i in missing:
+            unique.setdefault(normalize_sentence(sentences[i]), []).append(i)
+        texts = list(unique)
+        computed = self._embed_sentences(texts)
+        self.embedding_cache.set_many(self.embedding_model_id, texts, computed)
+        if embeddings is None:
+            embeddings = np.zeros((len(sentences), computed.shape[1]), dtype=np.float32)
+        for row, indices in zip(computed, unique.values()):
+            embeddings[indices] = row
+        return embeddings
+
+    def _embed_sentences(self, sentences):
+        encoded = self.tokenizer_bert(sentences, truncation=True, max_length=512)
+        features = [
+            {k: encoded[k][i] for k in encoded.keys()}
+            for i in range(len(sentences))
+        ]
+        # Sorting by token length keeps each padded batch close to its longest member.
+        order = sorted(range(len(sentences)), key=lambda i: len(features[i]['input_ids']))
+        embeddings = np.zeros((len(sentences), self.model_bert.config.hidden_size), dtype=np.float32)
+        encoder = self.bert_encoder
+        for start in range(0, len(order), self.embedding_batch_size):
+            batch_idx = order[start:start + self.embedding_batch_size]
+            inputs = self.tokenizer_bert.pad([features[i] for i in batch_idx], return_tensors='pt')
             inputs = {k: v.to(self.device) for k, v in inputs.items()}
             with torch.no_grad():
-                outputs = self.model_bert(**inputs)
-            embedding = torch.mean(outputs.logits[0], dim=0).cpu().data.numpy()
-            sentence_embeddings.append(embedding)
+                hidden = encoder(**inputs).last_hidden_state
+            mask = inputs['attention_mask'].unsqueeze(-1).to(hidden.dtype)
+            pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1)
+            embeddings[batch_idx] = pooled.cpu().numpy()
+        return embeddings
+
+    def _score_sentences(self, sentence_embeddings):
         doc_embedding = np.mean(sentence_embeddings, axis=0).reshape(1, -1)
-        similarities = cosine_similarity(sentence_embeddings, doc_embedding)
-        ranked_sentences = sorted(
-            ((sim[0], idx) for idx, sim in enumerate(similarities)),
-            reverse=True
-        )
-        if num_sentences > 0:
-            selected_indices = sorted([idx for _, idx in ranked_sentences[:num_sentences]])
+        return cosine_similarity(sentence_embeddings, doc_embedding)[:, 0]
+
+    def rank_sentences_batch(self, texts):
+        texts = [self._preprocess_text(text) for text in texts]
+        sentence_lists = [sent_tokenize(text) for text in texts]
+        # One embedding pass over every text's sentences lets short texts share batches with long ones.
+        flat = [sentence for sentences in sentence_lists for sentence in sentences]
+        embeddings = self.embed_sentences(flat) if flat else None
+        rankings = []
+        offset = 0
+        for sentences in sentence_lists:
+            count = len(sentences)
+            scores = self._score_sentences(embeddings[offset:offset + count]) if count else []
+            rankings.append(make_ranking(sentences, scores))
+            offset += count
+        return rankings
+
+    def rank_sentences(self, text):
+        return self.rank_sentences_batch([text])[0]
+
+    def get_extractive_summaries(self, texts, num_sentences):
+        return [select_ranked_sentences(ranking, num_sentences) for ranking in self.rank_sentences_batch(texts)]
+
+    def get_extractive_summary(self, text, num_sentences):
+        return self.get_extractive_summaries([text], num_sentences)[0]
+
+    def _chunk_text(self, text):
+        sentences = sent_tokenize(text)
+        if not sentences:
+            return []
+        encoded = self.tokenizer_mt5(sentences, add_special_tokens=False)['input_ids']
+        # Leave room for the end-of-sequence token the tokenizer appends to every chunk.
+        limit = self.chunk_tokens - 1
+        pieces = []
+        for sentence, ids in zip(sentences, encoded):
+            if len(ids) > limit:
+                # A sentence longer than a chunk would be cut off at max_length, so split it first.
+                pieces.extend(self._split_tokens(ids, limit))
+            else:
+                pieces.append((sentence, len(ids)))
+        chunks = []
+        current = []
+        current_length = 0
+        for sentence, length in pieces:
+            if current and current_length + length > limit:
+                chunks.append(' '.join(current))
+                current = []
+                current_length = 0
+            current.append(sentence)
+            current_length += length
+        if current:
+            chunks.append(' '.join(current))
+        return chunks
+
+    def _split_tokens(self, ids, limit):
+        # Cut at the last word start inside each window so words are not split across chunks.
+        tokens = self.tokenizer_mt5.convert_ids_to_tokens(ids)
+        pieces = []
+        start = 0
+        while start < len(ids):
+            end = min(start + limit, len(ids))
+            if end < len(ids):
+                boundary = next((i for i in range(end, start, -1) if tokens[i].startswith('\u2581')), start)
+                if boundary > start:
+                    end = boundary
+            pieces.append((self.tokenizer_mt5.decode(ids[start:end], skip_special_tokens=True).strip(), end - start))
+            start = end
+        return pieces
+
+    def _generate_summaries(self, texts, num_beams=None, max_new_tokens=None, stopping=None):
+        num_beams = num_beams or self.num_beams
+        if max_new_tokens is None:
+            lengths = {'min_length': ABSTRACTIVE_MIN_LENGTH, 'max_length': ABSTRACTIVE_MAX_LENGTH}
         else:
-            selected_indices = sorted([idx for _, idx in ranked_sentences])
-        summary = [sentences[idx] for idx in selected_indices]
-        return ' '.join(summary)
+            lengths = {'min_length': min(ABSTRACTIVE_MIN_LENGTH, max_new_tokens // 2), 'max_new_tokens': max_new_tokens}
+        if stopping is not None:
+            lengths['stopping_criteria'] = StoppingCriteriaList([stopping])
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        summaries = [None] * len(texts)
+        for start in range(0, len(order), self.generation_batch_size):
+            if stopping is not None and stopping.expired():
+                stopping.triggered = True
+                break
+            batch_idx = order[start:start + self.generation_batch_size]
+            inputs = self.tokenizer_mt5(
+                [texts[i] for i in batch_idx],
+                return_tensors="pt",
+                padding=True,
+                truncation=True,
+                max_length=self.chunk_tokens
+            )
+            inputs = {k: v.to(self.device) for k, v in inputs.items()}
+            started = time.perf_counter()
+            with torch.no_grad():
+                output_ids = self.model_mt5.generate(
+                    input_ids=inputs['input_ids'],
+                    attention_mask=inputs['attention_mask'],
+                    no_repeat_ngram_size=2,
+                    num_beams=num_beams,
+                    **lengths
+                )
+            self._record_step_time(time.perf_counter() - started, output_ids.shape[1], len(batch_idx), num_beams)
+            decoded = self.tokenizer_mt5.batch_decode(
+                output_ids,
+                skip_special_tokens=True,
+                clean_up_tokenization_spaces=False
+            )
+            for i, summary in zip(batch_idx, decoded):
+                summaries[i] = summary
+        return summaries
+
+    def _record_step_time(self, seconds, steps, batch_size, num_beams):
+        observed = seconds / (max(steps, 1) * batch_size * _beam_cost(num_beams))
+        with self._step_lock:
+            self.step_seconds = 0.8 * self.step_seconds + 0.2 * observed
+
+    def choose_decoding(self, text, budget_seconds):
+        # Map-reduce runs one generate per chunk plus a final pass over the joined partial summaries.
+        tokens = len(self.tokenizer_mt5(text, add_special_tokens=False)['input_ids'])
+        chunks = max(1, math.ceil(tokens / (self.chunk_tokens - 1)))
+        sequences = chunks + 1 if chunks > 1 else 1
+        for num_beams, max_new_tokens in DECODING_LADDER:
+            estimate = sequences * max_new_tokens * self.step_seconds * _beam_cost(num_beams)
+            if estimate <= budget_seconds * DECODING_BUDGET_SHARE:
+                return num_beams, max_new_tokens, estimate
+        return DECODING_LADDER[-1][0], DECODING_LADDER[-1][1], estimate
+
+    def get_abstractive_summaries(self, texts, num_beams=None, max_new_tokens=None, stopping=None):
+        texts = [self._whitespace_handler(self._preprocess_text(text)) for text in texts]
+        for _ in range(ABSTRACTIVE_MAX_ROUNDS):
+            chunk_lists = {i: self._chunk_text(text) for i, text in enumerate(texts)}
+            chunk_lists = {i: chunks for i, chunks in chunk_lists.items() if len(chunks) > 1}
+            if not chunk_lists:
+                break
+            # Chunks from every text that still needs reducing go through generate together.
+            flat = [chunk for chunks in chunk_lists.values() for chunk in chunks]
+            partials = self._generate_summaries(flat, num_beams, max_new_tokens, stopping)
+            offset = 0
+            for i, chunks in chunk_lists.items():
+                done = [partial for partial in partials[offset:offset + len(chunks)] if partial]
+                texts[i] = self._whitespace_handler(' '.join(done))
+                offset += len(chunks)
+            if stopping is not None and stopping.triggered:
+                # Out of time: the chunk summaries written so far are the partial result.
+                return texts
+        return [summary or '' for summary in self._generate_summaries(texts, num_beams, max_new_tokens, stopping)]
 
     def get_abstractive_summary(self, text):
-        text = self._preprocess_text(text)
-        inputs = self.tokenizer_mt5(
-            [self._whitespace_handler(text)],
-            return_tensors="pt",
-            padding="max_length",
-            truncation=True,
-            max_length=512
-        )
-        inputs = {k: v.to(self.device) for k, v in inputs.items()}
-        input_ids = inputs['input_ids']
-        with torch.no_grad():
-            output_ids = self.model_mt5.generate(
-                input_ids=input_ids,
-                min_length=40,
-                max_length=200,
-                no_repeat_ngram_size=2,
-                num_beams=4
-            )[0]
-
-        summary = self.tokenizer_mt5.decode(
-            output_ids,
-            skip_special_tokens=True,
-            clean_up_tokenization_spaces=False
-        )
-        return summary
+        return self.get_abstractive_summaries([text])[0]
+
+    def get_abstractive_summary_within(self, text, deadline=None):
+        started = time.time()
+        if deadline is None:
+            summary = self.get_abstractive_summary(text)
+            decoding = {'strategy': 'beam', 'num_beams': self.num_beams, 'max_new_tokens': ABSTRACTIVE_MAX_LENGTH,
+                        'budget_ms': None, 'estimated_ms': None, 'stopped_at_deadline': False, 'degraded': False}
+        else:
+            budget = deadline - started
+            num_beams, max_new_tokens, estimate = self.choose_decoding(text, budget)
+            if num_beams > 1:
+                strategy = 'beam'
+            elif max_new_tokens < ABSTRACTIVE_MAX_LENGTH:
+                strategy = 'greedy_capped'
+            else:
+                strategy = 'greedy'
+            stopping = DeadlineCriteria(deadline)
+            summary = self.get_abstractive_summaries([text], num_beams, max_new_tokens, stopping)[0]
+            decoding = {'strategy': strategy, 'num_beams': num_beams, 'max_new_tokens': max_new_tokens,
+                        'budget_ms': round(budget * 1000), 'estimated_ms': round(estimate * 1000),
+                        'stopped_at_deadline': stopping.triggered,
+                        'degraded': stopping.triggered or (num_beams, max_new_tokens) != DECODING_LADDER[0]}
+        decoding['seconds'] = round(time.time() - started, 3)
+        return {'summary': summary, 'decoding': decoding}
 
     def summarize(self, text, summary_type='extractive', num_sentences=2):
         if summary_type == 'extractive':
             return self.get_extractive_summary(text, num_sentences)
         else:
-            return self.get_abstractive_summary(text)
\ No newline at end of file
+            return self.get_abstractive_summary(text)
+
+    def summarize_batch(self, texts, summary_type='extractive', num_sentences=2):
+        if summary_type == 'extractive':
+            return self.get_extractive_summaries(texts, num_sentences)
+        else:
+            return self.get_abstractive_summaries(texts)
+
+
+_shared_summarizer = None
+
+
+def get_summarizer():
+    global _shared_summarizer
+    if _shared_summarizer is None:
+        _shared_summarizer = TextSummarizer()
+    return _shared_summarizer
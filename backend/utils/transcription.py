@@ -1,32 +1,224 @@
 import logging
 import os
 import re
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from contextlib import contextmanager
 
-import librosa
+import numpy as np
 import spacy
 import torch
-from pydub import AudioSegment
+from pydub.utils import get_encoder_name
 from pytubefix import YouTube
 from transformers import Speech2TextProcessor, Speech2TextForConditionalGeneration
 from youtube_transcript_api import YouTubeTranscriptApi, NoTranscriptFound, NotTranslatable, \
-    TranscriptsDisabled
+    TranscriptsDisabled, TranslationLanguageNotAvailable
+
+from utils.cache import LRUCache
+from utils.http_client import get_session
+from utils.metrics import timed
+from utils.model_registry import registry
+from utils.youtube import extract_video_id, fetch_video_length, video_length_cache
 
 logger = logging.getLogger(__name__)
 
+# Errors that mean the transcript really does not exist; anything else (timeouts, 429s, resets) is transient.
+MISSING_TRANSCRIPT_ERRORS = (NoTranscriptFound, TranscriptsDisabled, NotTranslatable, TranslationLanguageNotAvailable)
+
+transcript_list_cache = LRUCache(max_size=256, ttl=10 * 60)
+transcript_cache = LRUCache(max_size=1024, ttl=60 * 60)
+
+FETCH_WORKERS = 4
+FETCH_TIMEOUT = 30
+FETCH_POOL_SIZE = 16
+
+_fetch_executor = None
+_fetch_executor_pid = None
+_fetch_executor_lock = threading.Lock()
+
+
+def get_fetch_executor():
+    # One bounded pool per process, created after any fork: a fetch that misses its deadline keeps its
+    # thread until the HTTP call returns, and a shared pool caps how many of those can pile up.
+    global _fetch_executor, _fetch_executor_pid
+    if _fetch_executor is None or _fetch_executor_pid != os.getpid():
+        with _fetch_executor_lock:
+            if _fetch_executor is None or _fetch_executor_pid != os.getpid():
+                _fetch_executor = ThreadPoolExecutor(max_workers=FETCH_POOL_SIZE,
+                                                     thread_name_prefix='transcript-fetch')
+                _fetch_executor_pid = os.getpid()
+    return _fetch_executor
+
+
+ASR_MODEL_NAME = 'facebook/s2t-medium-mustc-multilingual-st'
+ASR_SAMPLE_RATE = 16000
+ASR_WINDOW_SECONDS = 30
+ASR_OVERLAP_SECONDS = 2
+ASR_BATCH_SIZE = 4
+ASR_DEVICE = 'cuda' if torch.cuda.is_available() else 'cpu'
+
+
+def _load_asr():
+    processor = Speech2TextProcessor.from_pretrained(ASR_MODEL_NAME)
+    model = Speech2TextForConditionalGeneration.from_pretrained(ASR_MODEL_NAME)
+    model.to(ASR_DEVICE)
+    model.eval()
+    return model, processor
+
+
+registry.register('s2t', _load_asr)
+
+WHITESPACE_PATTERN = re.compile(r'\s+')
+BRACKETED_PATTERN = re.compile(r'\[.*?\]')
+FILLER_PATTERN = re.compile(r'\b(um|uh|like|you know)\b', re.IGNORECASE)
+NLP_CHUNK_CHARS = 100000
+NLP_BATCH_SIZE = 4
+
+
+def _load_nlp():
+    try:
+        import coreferee
+    except ImportError:
+        print("coreferee is not installed. Preprocessing without coreference resolution.")
+        # Sentence boundaries only need the parser.
+        return spacy.load("en_core_web_sm", exclude=["tagger", "attribute_ruler", "lemmatizer", "ner"])
+    # coreferee relies on tags, lemmas and entities, so it gets the full pipeline.
+    nlp = spacy.load("en_core_web_sm")
+    nlp.add_pipe("coreferee")
+    return nlp
+
+
+registry.register('spacy:en', _load_nlp)
+
+
+def _split_for_nlp(text, max_chars=NLP_CHUNK_CHARS):
+    chunks = []
+    while len(text) > max_chars:
+        cut = text.rfind('. ', 0, max_chars)
+        cut = max_chars if cut == -1 else cut + 1
+        chunks.append(text[:cut])
+        text = text[cut:]
+    if text.strip():
+        chunks.append(text)
+    return chunks
+
+
+def _resolve_sentence(doc, sent):
+    if not doc.has_extension('coref_chains') or not doc._.coref_chains:
+        return sent.text
+    parts = []
+    for token in sent:
+        resolved = doc._.coref_chains.resolve(token)
+        if resolved:
+            parts.append(' and '.join(t.text for t in resolved) + token.whitespace_)
+        else:
+            parts.append(token.text_with_ws)
+    return ''.join(parts)
+
+
+def iter_audio_windows(audio_path, window_seconds=ASR_WINDOW_SECONDS, overlap_seconds=ASR_OVERLAP_SECONDS):
+    # ffmpeg decodes straight to 16 kHz mono PCM on a pipe, so only one window is held in memory at a time.
+    window = int(window_seconds * ASR_SAMPLE_RATE)
+    overlap = int(overlap_seconds * ASR_SAMPLE_RATE)
+    hop = window - overlap
+    command = [get_encoder_name(), '-nostdin', '-loglevel', 'error', '-i', audio_path,
+               '-f', 's16le', '-ac', '1', '-ar', str(ASR_SAMPLE_RATE), '-']
+    process = subprocess.Popen(command, stdout=subprocess.PIPE)
+    buffer = np.zeros(0, dtype=np.float32)
+    start = 0
+    try:
+        while True:
+            chunk = process.stdout.read(hop * 2)
+            if not chunk:
+                break
+            samples = np.frombuffer(chunk[:len(chunk) // 2 * 2], dtype=np.int16).astype(np.float32) / 32768.0
+            buffer = np.concatenate([buffer, samples])
+            while len(buffer) >= window:
+                yield start / ASR_SAMPLE_RATE, buffer[:window]
+                buffer = buffer[hop:]
+                start += hop
+        if len(buffer) > overlap or (start == 0 and len(buffer)):
+            yield start / ASR_SAMPLE_RATE, buffer
+    finally:
+        process.stdout.close()
+        if process.poll() is None:
+            process.kill()
+        process.wait()
+
+
+def _merge_overlap(previous, current, max_words=12):
+    # Consecutive windows share a few seconds of audio, so drop words the previous window already produced.
+    prev_words = previous.split()
+    words = current.split()
+    for size in range(min(max_words, len(prev_words), len(words)), 0, -1):
+        if [w.lower() for w in prev_words[-size:]] == [w.lower() for w in words[:size]]:
+            return ' '.join(words[size:])
+    return current
+
+
+def stitch_segments(segments):
+    stitched = []
+    for segment in segments:
+        text = segment['text'].strip()
+        if stitched:
+            text = _merge_overlap(stitched[-1]['text'], text)
+        if text:
+            stitched.append(dict(segment, text=text))
+    return stitched
+
+
 class Transcription:
-    def __init__(self, video_url, languages=None):
+    def __init__(self, video_url, languages=None, transcript_api=None, fetch_workers=FETCH_WORKERS,
+                 fetch_timeout=FETCH_TIMEOUT):
         self.video_url = video_url
         self.languages = languages
-        self.transcript = YouTubeTranscriptApi()
+        # One pooled keep-alive session is shared by every transcript client instead of a handshake per call.
+        self.transcript = transcript_api or YouTubeTranscriptApi(http_client=get_session())
+        self.fetch_workers = fetch_workers
+        self.fetch_timeout = fetch_timeout
+        self._transcript_list = None
+        self.asr_segments = []
+        self.timings = {'preprocess': 0.0}
         if languages is None:
             self.languages = ['en']
         if video_url is not None:
-            self.video_id = video_url.split('v=')[1]
+            self.video_id = self.extract_video_id(video_url)
+
+    @staticmethod
+    def extract_video_id(video_url):
+        return extract_video_id(video_url)
+
+    def get_transcript_list(self):
+        if self._transcript_list is None:
+            transcript_list = transcript_list_cache.get(self.video_id)
+            if transcript_list is None:
+                transcript_list = self.transcript.list(self.video_id)
+                transcript_list_cache.set(self.video_id, transcript_list)
+            self._transcript_list = transcript_list
+        return self._transcript_list
+
+    def get_video_length(self):
+        length = video_length_cache.get(self.video_id)
+        if length is not None:
+            return length
+        try:
+            # The transcript list is needed anyway, and its watch-page fetch records the length.
+            self.get_transcript_list()
+        except Exception:
+            pass
+        length = fetch_video_length(self.video_id, get_session())
+        if length is None:
+            length = YouTube(self.video_url, 'WEB').length
+            video_length_cache.set(self.video_id, length)
+        return length
 
     def check_if_available(self):
         try:
-            transcript = self.transcript.get_transcript(video_id=self.video_id, languages=self.languages)
-            print(transcript)
+            self.get_transcript_list().find_transcript(self.languages)
             print('----Youtube Transcription Available----')
             return True
         except TranscriptsDisabled:
@@ -45,7 +237,7 @@ class Transcription:
     def list_transcript_languages(self):
         status_dict = {}
         try:
-            transcript_list = self.transcript.list(self.video_id)
+            transcript_list = self.get_transcript_list()
             for lang in self.languages:
                 if lang in transcript_list._manually_created_transcripts:
                     status_dict[lang] = 'manual'
@@ -64,122 +256,157 @@ class Transcription:
                 status_dict[lang] = 'error'
         return status_dict
 
+    @contextmanager
     def fetch_audio(self):
-        yt = YouTube(self.video_url, 'WEB')
-        audio_streams = yt.streams.filter(only_audio=True).first()
-        audio_file = audio_streams.download(output_path="./temp/", filename="audio.mp4")
-        wav_audio = AudioSegment.from_file(audio_file)
-        wav_audio.export(output_path="./temp/audio.wav", format="wav")
-        os.remove(audio_file)
-        return audio_file
+        workdir = tempfile.mkdtemp(prefix=f'yt-audio-{self.video_id}-')
+        try:
+            yt = YouTube(self.video_url, 'WEB')
+            audio_streams = yt.streams.filter(only_audio=True).first()
+            yield audio_streams.download(output_path=workdir, filename="audio.mp4")
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
 
     @staticmethod
     def preprocess_text(text, lang="en"):
-        text = re.sub(r'\s+', ' ', text)
-        text = re.sub(r'\[.*?\]', '', text)
-        if lang == "en":
-            try:
-                nlp = spacy.load("en_core_web_sm")
-                doc = nlp(text)
-                sentences = [sent.text.strip() for sent in doc.sents]
-                cleaned_sentences = []
-                for sent in sentences:
-                    sent_clean = re.sub(r'\b(um|uh|like|you know)\b', '', sent, flags=re.IGNORECASE)
-                    if sent_clean and len(sent_clean.split()) > 3:
-                        cleaned_sentences.append(sent_clean)
-                processed_text = '. '.join(cleaned_sentences)
-            except Exception:
-                return text
-            try:
-                import coreferee
-                if "coreferee" not in nlp.pipe_names:
-                    nlp.add_pipe("coreferee")
-                doc = nlp(processed_text)
-                if doc._.has_coref:
-                    resolved_text = doc._.coref_chains.resolve(processed_text)
-                    return resolved_text
-                else:
-                    return processed_text
-            except ImportError:
-                print("coreferee is not installed. Returning processed text without coreference resolution.")
-                return processed_text
-        else:
+        text = WHITESPACE_PATTERN.sub(' ', text)
+        text = BRACKETED_PATTERN.sub('', text)
+        if lang != "en":
+            return text
+        try:
+            nlp = registry.get('spacy:en')
+        except Exception:
             return text
+        cleaned_sentences = []
+        for doc in nlp.pipe(_split_for_nlp(text), batch_size=NLP_BATCH_SIZE):
+            for sent in doc.sents:
+                sent_clean = FILLER_PATTERN.sub('', _resolve_sentence(doc, sent).strip())
+                if sent_clean and len(sent_clean.split()) > 3:
+                    cleaned_sentences.append(sent_clean)
+        return '. '.join(cleaned_sentences)
+
+    def _fetch_language(self, transcript_list, lang):
+        transcript = None
+        source_type = "not_available"
+        transient = False
+        candidates = [lang]
+        if lang == 'en':
+            candidates = ['en', 'en-GB', 'en-US']
+        for candidate in candidates:
+            if candidate in transcript_list._manually_created_transcripts:
+                try:
+                    transcript = transcript_list.find_manually_created_transcript(
+                        language_codes=[candidate])
+                    transcript = transcript.fetch()
+                    source_type = "manual"
+                    break
+                except Exception as e:
+                    transient = transient or not isinstance(e, MISSING_TRANSCRIPT_ERRORS)
+                    print(f"Error fetching manual {candidate} transcript: {str(e)}")
+        if not transcript:
+            for candidate in candidates:
+                if candidate in transcript_list._generated_transcripts:
+                    try:
+                        transcript = transcript_list.find_generated_transcript(
+                            language_codes=[candidate])
+                        transcript = transcript.fetch()
+                        source_type = "auto_generated"
+                        break
+                    except Exception as e:
+                        transient = transient or not isinstance(e, MISSING_TRANSCRIPT_ERRORS)
+                        print(f"Error fetching auto-generated {candidate} transcript: {str(e)}")
+        if not transcript:
+            possible_sources = []
+            for available_transcript in transcript_list:
+                translation_langs = [tlang.language_code for tlang in
+                                     available_transcript.translation_languages]
+                if lang in translation_langs:
+                    possible_sources.append(available_transcript)
+            preferred_order = ['en-GB', 'en-US', 'en']
+            ordered_sources = []
+            for code in preferred_order:
+                for source in possible_sources:
+                    if source.language_code == code:
+                        ordered_sources.append(source)
+            for source in possible_sources:
+                if source.language_code not in preferred_order:
+                    ordered_sources.append(source)
+            for available_transcript in ordered_sources:
+                try:
+                    transcript = available_transcript.translate(lang)
+                    transcript = transcript.fetch()
+                    source_type = "translated"
+                    break
+                except Exception as e:
+                    transient = transient or not isinstance(e, MISSING_TRANSCRIPT_ERRORS)
+                    print(f"Error translating to {lang} from {available_transcript.language_code}: {str(e)}")
+        if not transcript:
+            return [], "error" if transient else "not_available"
+        segments = [{'text': entry.text, 'start': entry.start, 'duration': entry.duration} for entry in transcript]
+        return segments, source_type
+
+    def get_segments(self, lang):
+        cached = transcript_cache.get((self.video_id, lang))
+        if cached is not None:
+            return cached
+        segments, source_type = self._fetch_language(self.get_transcript_list(), lang)
+        cached = {'segments': segments, 'source_type': source_type}
+        # A transient failure must not hide the language for the whole cache TTL.
+        if source_type != 'error':
+            transcript_cache.set((self.video_id, lang), cached)
+        return cached
+
+    def fetch_all_segments(self):
+        results = {}
+        pending = []
+        for lang in self.languages:
+            cached = transcript_cache.get((self.video_id, lang))
+            if cached is not None:
+                results[lang] = cached
+            else:
+                pending.append(lang)
+        if not pending:
+            return results
+        self.get_transcript_list()
+        if len(pending) == 1 or self.fetch_workers <= 1:
+            for lang in pending:
+                results[lang] = self.get_segments(lang)
+            return results
+        executor = get_fetch_executor()
+        futures = {lang: executor.submit(self.get_segments, lang) for lang in pending}
+        # The deadline is best-effort. A fetch that misses it cannot be interrupted and keeps its thread until
+        # the HTTP call returns, which with the session's retry policy (utils/http_client.py) can take
+        # (HTTP_READ_RETRIES + 1) read timeouts plus backoff per request. Under throttling those threads fill
+        # the shared pool, and later fetches wait in its queue until their own deadline turns them into errors.
+        deadline = time.monotonic() + self.fetch_timeout
+        for lang, future in futures.items():
+            try:
+                results[lang] = future.result(timeout=max(0, deadline - time.monotonic()))
+            except TimeoutError:
+                future.cancel()
+                print(f"Timed out fetching {lang} transcript for {self.video_id}")
+                results[lang] = {'segments': [], 'source_type': 'error'}
+        return results
 
     def get_transcripts(self):
         transcripts_dict = {}
         try:
-            transcript_list = self.transcript.list(self.video_id)
-            logger.info(transcript_list)
+            segments_by_lang = self.fetch_all_segments()
             for lang in self.languages:
+                cached = segments_by_lang[lang]
                 transcript_text = ""
-                source_type = "not_available"
-                transcript = None
-                candidates = [lang]
-                if lang == 'en':
-                    candidates = ['en', 'en-GB', 'en-US']
-                for candidate in candidates:
-                    if candidate in transcript_list._manually_created_transcripts:
-                        logging.info(transcript_list._manually_created_transcripts)
-                        try:
-                            transcript = transcript_list.find_manually_created_transcript(
-                                language_codes=[candidate])
-                            transcript = transcript.fetch()
-                            logging.info(transcript)
-                            source_type = "manual"
-                            break
-                        except Exception as e:
-                            print(f"Error fetching manual {candidate} transcript: {str(e)}")
-                    if transcript:
-                        break
-                if not transcript:
-                    for candidate in candidates:
-                        if candidate in transcript_list._generated_transcripts:
-                            try:
-                                transcript = transcript_list.find_generated_transcript(
-                                    language_codes=[candidate])
-                                transcript = transcript.fetch()
-                                source_type = "auto_generated"
-                                break
-                            except Exception as e:
-                                print(f"Error fetching auto-generated {candidate} transcript: {str(e)}")
-                        if transcript:
-                            break
-                if not transcript:
-                    possible_sources = []
-                    for available_transcript in transcript_list:
-                        translation_langs = [tlang.language_code for tlang in
-                                             available_transcript.translation_languages]
-                        if lang in translation_langs:
-                            possible_sources.append(available_transcript)
-                    preferred_order = ['en-GB', 'en-US', 'en']
-                    ordered_sources = []
-                    for code in preferred_order:
-                        for source in possible_sources:
-                            if source.language_code == code:
-                                ordered_sources.append(source)
-                    for source in possible_sources:
-                        if source.language_code not in preferred_order:
-                            ordered_sources.append(source)
-                    for available_transcript in ordered_sources:
-                        try:
-                            transcript = available_transcript.translate(lang)
-                            transcript = transcript.fetch()
-                            source_type = "translated"
-                            break
-                        except Exception as e:
-                            print(f"Error translating to {lang} from {available_transcript.language_code}: {str(e)}")
-                if transcript:
+                if cached['segments']:
                     if lang == 'en':
-                        transcript_text = " ".join([entry.text.strip() for entry in transcript])
+                        transcript_text = " ".join([entry['text'].strip() for entry in cached['segments']])
                     else:
-                        transcript_text = ". ".join([entry.text.replace('।', '').strip() for entry in transcript])
+                        transcript_text = ". ".join([entry['text'].replace('।', '').strip() for entry in cached['segments']])
+                    started = time.perf_counter()
                     transcript_text = self.preprocess_text(transcript_text, lang=lang)
-                transcripts_dict[lang] = {
-                    'text': transcript_text,
-                    'source_type': source_type if transcript_text else 'not_available'
-                }
-        except (TranscriptsDisabled, TranscriptsDisabled) as e:
+                    self.timings['preprocess'] += time.perf_counter() - started
+                source_type = cached['source_type']
+                if not transcript_text and source_type != 'error':
+                    source_type = 'not_available'
+                transcripts_dict[lang] = {'text': transcript_text, 'source_type': source_type}
+        except (TranscriptsDisabled, NoTranscriptFound) as e:
             print(f"Transcripts disabled or not found: {str(e)}")
             for lang in self.languages:
                 transcripts_dict[lang] = {'text': "", 'source_type': 'not_available'}
@@ -189,26 +416,38 @@ class Transcription:
                 transcripts_dict[lang] = {'text': "", 'source_type': 'error'}
         return transcripts_dict
 
-    def transcribe_with_speech_to_text(self):
-        model_name = 'facebook/s2t-medium-mustc-multilingual-st'
-        device = 'cuda' if torch.cuda.is_available() else 'cpu'
-        audio_path = self.fetch_audio()
-        processor = Speech2TextProcessor.from_pretrained(model_name)
-        model = Speech2TextForConditionalGeneration.from_pretrained(model_name)
-        model.to(device)
-        waveform, sample_rate = librosa.load(audio_path, sr=16000)
-        inputs = processor(waveform, return_tensors="pt", padding=True, sampling_rate=sample_rate)
+    def _transcribe_batch(self, model, processor, batch):
+        inputs = processor([samples for _, samples in batch], return_tensors="pt", padding=True,
+                           sampling_rate=ASR_SAMPLE_RATE)
+        inputs = {k: v.to(ASR_DEVICE) for k, v in inputs.items()}
         with torch.no_grad():
-            generated_ids = model.generate(inputs['input_features'])
-        transcription = processor.batch_decode(generated_ids[0], skip_special_tokens=True)
-        os.remove(audio_path)
-        return transcription
+            generated_ids = model.generate(inputs['input_features'], attention_mask=inputs.get('attention_mask'))
+        texts = processor.batch_decode(generated_ids, skip_special_tokens=True)
+        return [
+            {'text': text, 'start': start, 'duration': len(samples) / ASR_SAMPLE_RATE}
+            for (start, samples), text in zip(batch, texts)
+        ]
+
+    def transcribe_with_speech_to_text(self):
+        model, processor = registry.get('s2t')
+        segments = []
+        batch = []
+        with timed('asr'), self.fetch_audio() as audio_path:
+            for window in iter_audio_windows(audio_path):
+                batch.append(window)
+                if len(batch) == ASR_BATCH_SIZE:
+                    segments.extend(self._transcribe_batch(model, processor, batch))
+                    batch = []
+            if batch:
+                segments.extend(self._transcribe_batch(model, processor, batch))
+        self.asr_segments = stitch_segments(segments)
+        return ' '.join(segment['text'] for segment in self.asr_segments)
 
     def transcribe(self):
         text = ""
         if self.check_if_available():
-            transcript = self.transcript.get_transcript(self.video_id)
-            for entry in transcript:
+            cached = self.get_segments(self.languages[0])
+            for entry in cached['segments']:
                 text += ". " + entry['text'].capitalize()
         else:
             text = self.transcribe_with_speech_to_text()
@@ -0,0 +1,56 @@
+import logging
+import re
+
+from utils.cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+WATCH_URL = 'https://www.youtube.com/watch?v={video_id}'
+# Both the watch page and innertube player responses embed videoDetails with the id first.
+VIDEO_DETAILS_PATTERN = re.compile(r'"videoDetails":\s*\{\s*"videoId":\s*"([\w-]{11})".{0,2000}?"lengthSeconds":\s*"(\d+)"',
+                                   re.DOTALL)
+# watch?v=, youtu.be/, /shorts/, /embed/ and /live/ links, ignoring any other query parameters (t=, list=, si=).
+VIDEO_ID_PATTERN = re.compile(r'(?:[?&]v=|youtu\.be/|/shorts/|/embed/|/live/)([\w-]{11})(?![\w-])')
+
+video_length_cache = LRUCache(max_size=1024, ttl=24 * 60 * 60)
+
+
+def extract_video_id(video_url):
+    match = VIDEO_ID_PATTERN.search(video_url)
+    if match is not None:
+        return match.group(1)
+    return video_url.split('v=')[1]
+
+
+def parse_video_length(body):
+    match = VIDEO_DETAILS_PATTERN.search(body)
+    if match is None:
+        return None, None
+    return match.group(1), int(match.group(2))
+
+
+def record_video_metadata(response, *args, **kwargs):
+    # Session response hook: the transcript client already downloads the watch page (or player JSON),
+    # so the video length is picked up from that response instead of a separate metadata request.
+    if response.status_code != 200 or not ('/watch' in response.url or '/youtubei/v1/player' in response.url):
+        return
+    video_id, length = parse_video_length(response.text)
+    if video_id is not None:
+        video_length_cache.set(video_id, length)
+
+
+def fetch_video_length(video_id, session, watch_url=WATCH_URL):
+    length = video_length_cache.get(video_id)
+    if length is not None:
+        return length
+    try:
+        response = session.get(watch_url.format(video_id=video_id))
+        response.raise_for_status()
+    except Exception as e:
+        logger.warning(f"Watch page fetch failed for {video_id}: {e}")
+        return None
+    parsed_id, length = parse_video_length(response.text)
+    if length is not None and parsed_id == video_id:
+        video_length_cache.set(video_id, length)
+        return length
+    return None